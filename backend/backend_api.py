@@ -2,14 +2,21 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import json
 import uuid
 import shutil
+import hashlib
+import zipfile
+from typing import Literal
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend_embedding_service import get_embedder
 from backend_full_pipeline import ResumeScreeningAI
+from backend_jobs import JobQueue
 from backend_step4_email import EmailSender
+from backend_step5_rag_chatbot import RAG_SNAPSHOT_DIR
 
 app = FastAPI(title="Resume Screening AI Backend")
 
@@ -18,16 +25,92 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count", "X-Ranking-Version"],
 )
 
 UPLOAD_FOLDER = "uploaded_resumes"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# upload limits — a ZIP bomb must not fill the upload volume
+UPLOAD_MAX_FILE_MB = float(os.getenv("UPLOAD_MAX_FILE_MB", "20"))
+UPLOAD_MAX_ZIP_MB = float(os.getenv("UPLOAD_MAX_ZIP_MB", "1024"))
+UPLOAD_MAX_ZIP_MEMBERS = int(os.getenv("UPLOAD_MAX_ZIP_MEMBERS", "2000"))
+
+# active session + JD, so a restarted server picks up where it was
+SESSION_FILE = os.getenv("SESSION_FILE", ".session.json")
+
 pipeline: ResumeScreeningAI | None = None
 jd_locked = False
 active_session_id = None
 
 email_sender = EmailSender()
+job_queue = JobQueue()
+
+# =====================================================
+# STARTUP — LOAD + WARM THE SHARED EMBEDDER ONCE
+# =====================================================
+
+@app.on_event("startup")
+def warm_models():
+    get_embedder()
+
+
+# =====================================================
+# STARTUP — RESTORE THE LAST SESSION
+# =====================================================
+
+@app.on_event("startup")
+def restore_session():
+    global pipeline, jd_locked, active_session_id
+
+    try:
+        with open(SESSION_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    # chatbot comes from the RAG snapshot → /rag_query works at once
+    pipeline = ResumeScreeningAI(
+        jd_text=state["jd_text"],
+        resume_folder=UPLOAD_FOLDER,
+        sender_email=None,
+        sender_password=None,
+        jd_schema=state.get("jd_schema"),
+        refresh=False,
+    )
+    active_session_id = state["session_id"]
+    jd_locked = True
+
+    for jd in state.get("jds", []):
+        pipeline.add_jd(jd["jd_text"], jd.get("title"), jd.get("jd_schema"))
+
+    # catch up with the upload folder in the background
+    _submit_ingestion(pipeline.parser.list_resume_files())
+
+    print("♻️ SESSION RESTORED — session:", active_session_id)
+
+
+def _save_session():
+    tmp = SESSION_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "session_id": active_session_id,
+            "jd_text": pipeline.jd_text,
+            "jd_schema": pipeline.jd_schema,
+            "jds": pipeline.added_jds(),
+        }, f)
+    os.replace(tmp, SESSION_FILE)
+
+
+# =====================================================
+# SHUTDOWN — FLUSH THE DEBOUNCED RAG SNAPSHOT
+# =====================================================
+
+@app.on_event("shutdown")
+def flush_snapshot():
+    if pipeline is not None:
+        pipeline.save_snapshot()
+
 
 # =====================================================
 # ROOT
@@ -42,7 +125,7 @@ def root():
 # SET JD (SESSION CONSISTENT)
 # =====================================================
 @app.post("/set_jd")
-async def set_jd(
+def set_jd(
     jd_text: str = Form(...),
     session_id: str | None = Form(None),
 ):
@@ -72,6 +155,7 @@ async def set_jd(
         sender_email=None,
         sender_password=None,
     )
+    _save_session()
 
     print("✅ JD SET — session:", active_session_id)
 
@@ -87,7 +171,7 @@ async def set_jd(
 # =====================================================
 
 @app.post("/upload_resume")
-async def upload_resume(
+def upload_resume(
     session_id: str = Form(...),
     file: UploadFile = File(...)
 ):
@@ -99,19 +183,196 @@ async def upload_resume(
     if session_id != active_session_id:
         raise HTTPException(status_code=400, detail="Invalid session")
 
-    # Prevent duplicate upload by filename
-    existing_files = os.listdir(UPLOAD_FOLDER)
-    if file.filename in existing_files:
+    # same streaming path as bulk upload → size cap, duplicate checks
+    result = _save_resume_stream(
+        file.file, file.filename, set(pipeline.resume_hashes.values())
+    )
+
+    if result["status"] == "duplicate":
         return {"message": "File already uploaded"}
 
-    path = os.path.join(UPLOAD_FOLDER, file.filename)
+    if result["status"] != "uploaded":
+        raise HTTPException(
+            status_code=413 if result["detail"] == "File too large" else 400,
+            detail=result["detail"],
+        )
+
+    job = _submit_ingestion([result["file"]])
+
+    return {"message": "Resume queued for ingestion", "job_id": job.id}
 
-    with open(path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
-    pipeline.refresh_resumes()
+# =====================================================
+# BACKGROUND INGESTION
+# =====================================================
+
+def _submit_ingestion(files):
+    target = pipeline
+
+    def run(job):
+        target.refresh_resumes(progress=job.update_file)
+
+        # another job may have picked these files up — settle from state
+        for f in files:
+            job.update_file(f, target.file_status(f))
+
+    return job_queue.submit(files, run)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
 
-    return {"message": "Resume uploaded successfully"}
+    return job.to_dict()
+
+
+# =====================================================
+# BULK UPLOAD (MULTI-FILE OR ZIP)
+# =====================================================
+
+def _save_resume_stream(src, filename, seen_hashes):
+    """
+    Stream one PDF into UPLOAD_FOLDER, hashing on the way; aborted
+    past UPLOAD_MAX_FILE_MB. Returns a per-file status dict.
+    """
+    name = os.path.basename(filename or "").strip()
+
+    if not name.lower().endswith(".pdf"):
+        return {"file": filename, "status": "skipped", "detail": "Not a PDF"}
+
+    path = os.path.join(UPLOAD_FOLDER, name)
+    if os.path.exists(path):
+        return {"file": name, "status": "duplicate", "detail": "Filename exists"}
+
+    tmp_path = path + ".part"
+    digest = hashlib.sha256()
+    max_bytes = int(UPLOAD_MAX_FILE_MB * 1024 * 1024)
+    written = 0
+
+    try:
+        with open(tmp_path, "wb") as buffer:
+            for block in iter(lambda: src.read(1 << 16), b""):
+                written += len(block)
+                if written > max_bytes:
+                    break
+
+                digest.update(block)
+                buffer.write(block)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    if written > max_bytes:
+        os.remove(tmp_path)
+        return {"file": name, "status": "failed", "detail": "File too large"}
+
+    digest = digest.hexdigest()
+
+    if digest in seen_hashes:
+        os.remove(tmp_path)
+        return {"file": name, "status": "duplicate", "detail": "Same content"}
+
+    os.replace(tmp_path, path)
+    seen_hashes.add(digest)
+
+    return {"file": name, "status": "uploaded"}
+
+
+@app.post("/upload_resumes")
+def upload_resumes(
+    session_id: str = Form(...),
+    files: list[UploadFile] = File(...),
+):
+    global pipeline, active_session_id
+
+    if pipeline is None or not jd_locked:
+        raise HTTPException(status_code=400, detail="Set JD first")
+
+    if session_id != active_session_id:
+        raise HTTPException(status_code=400, detail="Invalid session")
+
+    seen_hashes = set(pipeline.resume_hashes.values())
+    report = []
+
+    for upload in files:
+        if not (upload.filename or "").lower().endswith(".zip"):
+            report.append(
+                _save_resume_stream(upload.file, upload.filename, seen_hashes)
+            )
+            continue
+
+        try:
+            with zipfile.ZipFile(upload.file) as archive:
+                members = [
+                    m for m in archive.infolist()
+                    if not m.is_dir() and "__MACOSX" not in m.filename
+                ]
+
+                # declared sizes bound what zipfile will inflate
+                total_mb = sum(m.file_size for m in members) / (1024 * 1024)
+                too_big = (
+                    "Too many files in ZIP" if len(members) > UPLOAD_MAX_ZIP_MEMBERS
+                    else "ZIP archive too large" if total_mb > UPLOAD_MAX_ZIP_MB
+                    else None
+                )
+                if too_big:
+                    report.append({
+                        "file": upload.filename,
+                        "status": "failed",
+                        "detail": too_big,
+                    })
+                    continue
+
+                for member in members:
+                    if member.file_size > UPLOAD_MAX_FILE_MB * 1024 * 1024:
+                        report.append({
+                            "file": member.filename,
+                            "status": "failed",
+                            "detail": "File too large",
+                        })
+                        continue
+
+                    # one bad member (encrypted, unsupported compression,
+                    # corrupt) is reported; the rest still get ingested
+                    try:
+                        with archive.open(member) as src:
+                            report.append(
+                                _save_resume_stream(
+                                    src, member.filename, seen_hashes
+                                )
+                            )
+                    except (
+                        RuntimeError, NotImplementedError,
+                        zipfile.BadZipFile, OSError,
+                    ) as e:
+                        report.append({
+                            "file": member.filename,
+                            "status": "failed",
+                            "detail": (
+                                "Encrypted ZIP member" if isinstance(e, RuntimeError)
+                                else "Unsupported ZIP compression" if isinstance(e, NotImplementedError)
+                                else "Corrupt ZIP member"
+                            ),
+                        })
+        except zipfile.BadZipFile:
+            report.append({
+                "file": upload.filename,
+                "status": "failed",
+                "detail": "Invalid ZIP archive",
+            })
+
+    # one batched background ingestion for the whole upload
+    uploaded = [r["file"] for r in report if r["status"] == "uploaded"]
+    job = _submit_ingestion(uploaded) if uploaded else None
+
+    return {
+        "message": f"{len(uploaded)} of {len(report)} resumes queued",
+        "job_id": job.id if job else None,
+        "files": report,
+    }
 
 
 # =====================================================
@@ -119,7 +380,16 @@ async def upload_resume(
 # =====================================================
 
 @app.get("/ranked_candidates")
-def get_ranked_candidates(session_id: str):
+def get_ranked_candidates(
+    session_id: str,
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    min_score: float | None = Query(None, ge=0, le=100),
+    sort_by: str | None = None,
+    include_components: bool = False,
+):
     global pipeline, active_session_id
 
     if pipeline is None:
@@ -128,8 +398,116 @@ def get_ranked_candidates(session_id: str):
     if session_id != active_session_id:
         raise HTTPException(status_code=400, detail="Invalid session")
 
-    df = pipeline.rank_resumes()
-    return df.to_dict(orient="records")
+    if sort_by not in (None, "score", *pipeline.ranking.components):
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {sort_by}")
+
+    # 🔥 only the requested page is materialized
+    rows, total, version = pipeline.rank_page(
+        limit, offset, min_score, sort_by, include_components
+    )
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "X-Total-Count": str(total),
+    }
+
+    # 🔥 unchanged pool + same query → 304, client reuses its copy
+    if version is not None:
+        query = json.dumps(
+            [limit, offset, min_score, sort_by or "score", include_components]
+        )
+        query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()[:12]
+
+        etag = f'"{session_id}-{version}-{query_hash}"'
+        headers.update({"ETag": etag, "X-Ranking-Version": version})
+
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return rows
+
+
+# =====================================================
+# MULTI-JD — SAME POOL, SEVERAL REQUISITIONS
+# =====================================================
+
+@app.post("/jds")
+def add_jd(
+    session_id: str = Form(...),
+    jd_text: str = Form(...),
+    title: str | None = Form(None),
+):
+    global pipeline, active_session_id
+
+    if pipeline is None:
+        raise HTTPException(status_code=400, detail="Set JD first")
+
+    if session_id != active_session_id:
+        raise HTTPException(status_code=400, detail="Invalid session")
+
+    try:
+        jd_id = pipeline.add_jd(jd_text, title)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    _save_session()
+
+    return {"message": "JD added", "jd_id": jd_id}
+
+
+@app.get("/jds")
+def list_jds(session_id: str):
+    global pipeline, active_session_id
+
+    if pipeline is None:
+        raise HTTPException(status_code=400, detail="Set JD first")
+
+    if session_id != active_session_id:
+        raise HTTPException(status_code=400, detail="Invalid session")
+
+    return pipeline.list_jds()
+
+
+@app.delete("/jds/{jd_id}")
+def remove_jd(jd_id: str, session_id: str):
+    global pipeline, active_session_id
+
+    if pipeline is None:
+        raise HTTPException(status_code=400, detail="Set JD first")
+
+    if session_id != active_session_id:
+        raise HTTPException(status_code=400, detail="Invalid session")
+
+    try:
+        removed = pipeline.remove_jd(jd_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not removed:
+        raise HTTPException(status_code=404, detail="Unknown JD")
+
+    _save_session()
+
+    return {"message": "JD removed", "jd_id": jd_id}
+
+
+@app.get("/multi_jd_ranking")
+def get_multi_jd_ranking(
+    session_id: str,
+    mode: Literal["per_jd", "best_jd"] = "per_jd",
+    limit: int | None = Query(None, ge=1, le=1000),
+):
+    global pipeline, active_session_id
+
+    if pipeline is None:
+        raise HTTPException(status_code=400, detail="Set JD first")
+
+    if session_id != active_session_id:
+        raise HTTPException(status_code=400, detail="Invalid session")
+
+    # 🔥 one JD × resume score matrix behind both views
+    return pipeline.rank_multi_jd(mode, limit)
 
 
 # =====================================================
@@ -137,7 +515,7 @@ def get_ranked_candidates(session_id: str):
 # =====================================================
 
 @app.post("/send_email")
-async def send_email_endpoint(
+def send_email_endpoint(
     email: str = Form(...),
     name: str = Form(...),
     decision: str = Form(...)
@@ -159,7 +537,7 @@ async def send_email_endpoint(
 # =====================================================
 
 @app.api_route("/rag_query", methods=["GET", "POST"])
-async def rag_query(
+def rag_query(
     query: str,
     session_id: str,
     top_k: int = 5,
@@ -195,6 +573,9 @@ def reset_system():
 def _hard_reset():
     global pipeline, jd_locked, active_session_id
 
+    if pipeline is not None:
+        pipeline.close()
+
     pipeline = None
     jd_locked = False
     active_session_id = None
@@ -204,3 +585,10 @@ def _hard_reset():
             os.remove(os.path.join(UPLOAD_FOLDER, f))
         except:
             pass
+
+    # persisted session + RAG snapshot belong to the old resume set
+    try:
+        os.remove(SESSION_FILE)
+    except OSError:
+        pass
+    shutil.rmtree(RAG_SNAPSHOT_DIR, ignore_errors=True)
@@ -0,0 +1,454 @@
+"""
+Micro-benchmarks for the screening pipeline.
+
+Usage:
+    python backend_benchmarks.py skills
+    python backend_benchmarks.py embed
+    python backend_benchmarks.py onnx
+    python backend_benchmarks.py rank
+    python backend_benchmarks.py quant
+    python backend_benchmarks.py ann
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+
+
+def _timeit(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# =====================================================
+# SKILL MATCHER
+# =====================================================
+def bench_skills(args):
+    from backend_step2_resume_parser import ResumeParser
+
+    parser = ResumeParser(".")
+
+    def per_variant(text):
+        # reference implementation — one regex search per variant
+        text_lower = text.lower()
+        found = set()
+        for canonical, variants in ResumeParser.SKILL_MAP.items():
+            for v in variants:
+                if re.search(rf"\b{re.escape(v.lower())}\b", text_lower):
+                    found.add(canonical)
+                    break
+        return sorted(found)
+
+    rng = random.Random(0)
+    skills = [
+        v for variants in ResumeParser.SKILL_MAP.values() for v in variants
+    ] + ["next.js", "c++17", "javascripts", "aws-cdk"]
+    filler = (
+        "the of and to in a with for on team led built developed "
+        "pipelines data platform university project customer design"
+    ).split()
+
+    for words in (500, 5000, 50000):
+        # ~3% skill mentions, like a real resume
+        text = " ".join(
+            rng.choice(skills) if rng.random() < 0.03 else rng.choice(filler)
+            for _ in range(words)
+        )
+
+        assert parser._extract_skills(text) == per_variant(text)
+
+        old = _timeit(lambda: per_variant(text))
+        new = _timeit(lambda: parser._extract_skills(text))
+
+        print(
+            f"{words:>6} words | per-variant {old * 1e3:8.2f} ms | "
+            f"single-pass {new * 1e3:8.2f} ms | x{old / new:5.1f}"
+        )
+
+
+# =====================================================
+# SYNTHETIC RESUMES
+# =====================================================
+def _synthetic_resumes(n, seed=0):
+    from backend_step2_resume_parser import ResumeParser
+
+    rng = random.Random(seed)
+    skills = list(ResumeParser.SKILL_MAP)
+    filler = (
+        "designed built shipped owned led mentored scaled migrated "
+        "services pipelines dashboards models platform team customers "
+        "latency reliability cost"
+    ).split()
+
+    resumes = []
+    for i in range(n):
+        words = [
+            rng.choice(skills) if rng.random() < 0.1 else rng.choice(filler)
+            for _ in range(rng.randint(150, 900))
+        ]
+        text = f"Candidate {i}\n" + " ".join(words)
+        projects = " ".join(rng.choice(filler) for _ in range(rng.randint(0, 80)))
+        resumes.append({"text": text, "projects_text": projects})
+
+    return resumes
+
+
+# =====================================================
+# EMBEDDING — PER-ITEM VS BATCHED
+# =====================================================
+def bench_embed(args):
+    from backend_embedding_service import get_embedder
+
+    embedder = get_embedder()
+
+    for n in (100, 1000):
+        resumes = _synthetic_resumes(n)
+        texts = [r["text"] for r in resumes] + [
+            r["projects_text"] for r in resumes if r["projects_text"]
+        ]
+
+        start = time.perf_counter()
+        for t in texts:
+            embedder.encode([t], normalize_embeddings=True)
+        per_item = time.perf_counter() - start
+
+        start = time.perf_counter()
+        embedder.encode_batched(texts)
+        batched = time.perf_counter() - start
+
+        print(
+            f"{n:>5} resumes ({len(texts)} texts) | per-item "
+            f"{len(texts) / per_item:7.1f} texts/s | batched "
+            f"{len(texts) / batched:7.1f} texts/s | x{per_item / batched:4.1f}"
+        )
+
+
+# =====================================================
+# EMBEDDING BACKENDS — TORCH VS ONNX RUNTIME
+# =====================================================
+# minimum per-text cosine against torch before a backend is trusted
+ONNX_PARITY_MIN = {"onnx": 0.999, "onnx-int8": 0.95}
+
+
+def bench_onnx(args):
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    from backend_embedding_service import EMBED_MODEL_NAME
+    from backend_onnx_encoder import OnnxSentenceEncoder
+
+    resumes = _synthetic_resumes(512)
+    texts = [r["text"] for r in resumes] + [
+        r["projects_text"] for r in resumes if r["projects_text"]
+    ]
+
+    backends = {
+        "torch": SentenceTransformer(EMBED_MODEL_NAME, device="cpu"),
+        "onnx": OnnxSentenceEncoder(EMBED_MODEL_NAME),
+        "onnx-int8": OnnxSentenceEncoder(EMBED_MODEL_NAME, quantize=True),
+    }
+
+    reference = None
+
+    for name, model in backends.items():
+        def encode():
+            return np.asarray(model.encode(
+                texts,
+                batch_size=64,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ), dtype=np.float32)
+
+        model.encode(texts[:8], normalize_embeddings=True)
+        elapsed = _timeit(encode, repeat=3)
+        vectors = encode()
+
+        if reference is None:
+            reference = vectors
+
+        cosine = (vectors * reference).sum(axis=1)
+        max_abs = np.abs(vectors - reference).max()
+
+        print(
+            f"{name:>9} | {len(texts) / elapsed:7.1f} texts/s | "
+            f"cosine vs torch min {cosine.min():.4f} mean {cosine.mean():.4f}"
+            f" | max abs diff {max_abs:.2e}"
+        )
+
+        if name in ONNX_PARITY_MIN:
+            assert cosine.min() >= ONNX_PARITY_MIN[name], name
+
+
+# =====================================================
+# RANKING — PER-RESUME VS score_batch
+# =====================================================
+class _RandomEmbedder:
+    dim = 384
+
+    def embed(self, texts):
+        import numpy as np
+
+        rng = np.random.default_rng(len(texts[0]))
+        vecs = rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def _rank_fixture():
+    from backend_step3_ranking import ResumeRanker
+
+    return ResumeRanker(
+        _RandomEmbedder(),
+        "Senior DevOps engineer, 3-5 years, docker kubernetes terraform",
+        {
+            "core_skills": ["docker", "kubernetes", "terraform", "aws", "python"],
+            "min_experience": "3-5 years",
+            "responsibilities": ["Own CI/CD pipelines and cloud infrastructure"],
+            "project_expectations": [],
+        },
+    )
+
+
+def _embedded_resumes(n, seed=0, jd=None):
+    """
+    Synthetic resumes with skills, features and chunk / project vectors.
+    With `jd`, chunk vectors lean towards it by a random per-resume
+    amount so the semantic component actually separates candidates.
+    """
+    import numpy as np
+    from backend_step2_resume_parser import ResumeParser
+    from backend_step3_ranking import ResumeRanker
+
+    parser = ResumeParser(".")
+    rng = np.random.default_rng(seed)
+
+    resumes = _synthetic_resumes(n, seed)
+    for i, r in enumerate(resumes):
+        r["name"] = f"Candidate {i}"
+        r["skills"] = parser._extract_skills(r["text"])
+        r["experience_years"] = int(rng.integers(0, 10))
+
+        # ~1 chunk per 190 words, as chunk_spans() produces
+        chunks = rng.standard_normal(
+            (len(r["text"].split()) // 190 + 1, 384)
+        ).astype(np.float32)
+        chunks /= np.linalg.norm(chunks, axis=1, keepdims=True)
+        if jd is not None:
+            chunks += rng.uniform(0, 1.5) * jd
+
+        r["chunk_embeddings"] = chunks
+        r["project_embedding"] = (
+            rng.standard_normal(384).astype(np.float32)
+            if r["projects_text"] else None
+        )
+        # built once at ingest, as the pipeline does
+        r["features"] = ResumeRanker.build_features(r)
+
+    return resumes
+
+
+def _score_resume_reference(ranker, resume):
+    """
+    The per-resume scorer score_batch replaced, kept verbatim as the
+    reference — score_resume() itself now goes through score_batch.
+    """
+    try:
+        role = ranker.role_alignment_score(resume)
+        sem = ranker.semantic_score(resume)
+        skill, gate = ranker.skill_score(resume)
+        exp = ranker.experience_score(resume)
+        proj = ranker.project_score(resume)
+        resp = ranker.responsibility_score(resume)
+
+        weighted = (
+            ranker.W_ROLE * role +
+            ranker.W_SKILL * skill +
+            ranker.W_EXP * exp +
+            ranker.W_SEMANTIC_MAIN * sem +
+            ranker.W_PROJECT * proj +
+            ranker.W_RESP * resp
+        )
+
+        final = weighted * gate
+        final *= ranker._cluster_bonus(resume)
+
+        final = final ** 0.82
+        final = final * 1.55
+
+        if final < 0.12:
+            final *= 0.75
+
+        return round(min(final * 100, 100), 2)
+
+    except Exception:
+        return 0.0
+
+
+def bench_rank(args):
+    ranker = _rank_fixture()
+
+    for n in (1000, 10000):
+        resumes = _embedded_resumes(n)
+
+        loop = _timeit(
+            lambda: [_score_resume_reference(ranker, r) for r in resumes], repeat=1
+        )
+        batch = _timeit(lambda: ranker.score_batch(resumes), repeat=3)
+
+        reference = [_score_resume_reference(ranker, r) for r in resumes]
+        assert reference == ranker.score_batch(resumes)
+
+        print(
+            f"{n:>6} resumes | per-resume {loop * 1e3:9.1f} ms | "
+            f"score_batch {batch * 1e3:9.1f} ms | x{loop / batch:5.1f}"
+        )
+
+
+# =====================================================
+# STORAGE PRECISION — MEMORY VS RANKING DRIFT
+# =====================================================
+def bench_quant(args):
+    import numpy as np
+    from backend_embedding_codec import PRECISIONS, encode_vectors
+
+    ranker = _rank_fixture()
+    jd = np.asarray(ranker.jd_embedding, dtype=np.float32).reshape(-1)
+    jd /= np.linalg.norm(jd)
+
+    # pool sized to ~50k chunks
+    resumes = _embedded_resumes(17000, jd=jd)
+    n_chunks = sum(len(r["chunk_embeddings"]) for r in resumes)
+
+    originals = [
+        (r["chunk_embeddings"], r["project_embedding"]) for r in resumes
+    ]
+    reference = np.array(ranker.score_batch(resumes))
+    ref_order = np.argsort(-reference, kind="stable")
+    ref_rank = np.empty(len(resumes))
+    ref_rank[ref_order] = np.arange(len(resumes))
+
+    print(f"{len(resumes)} resumes, {n_chunks} chunks")
+
+    for precision in PRECISIONS:
+        nbytes = 0
+        for r, (chunks, proj) in zip(resumes, originals):
+            r["chunk_embeddings"] = encode_vectors(chunks, precision)
+            r["project_embedding"] = (
+                None if proj is None else encode_vectors(proj, precision)
+            )
+            nbytes += r["chunk_embeddings"].nbytes
+            if r["project_embedding"] is not None:
+                nbytes += r["project_embedding"].nbytes
+
+        elapsed = _timeit(lambda: ranker.score_batch(resumes), repeat=3)
+        scores = np.array(ranker.score_batch(resumes))
+
+        order = np.argsort(-scores, kind="stable")
+        rank = np.empty(len(resumes))
+        rank[order] = np.arange(len(resumes))
+
+        # Spearman rank correlation against float32
+        spearman = np.corrcoef(rank, ref_rank)[0, 1]
+        top = len(set(order[:100]) & set(ref_order[:100]))
+
+        print(
+            f"{precision:>8} | {nbytes / 2**20:7.1f} MB | "
+            f"score_batch {elapsed * 1e3:7.1f} ms | "
+            f"max |Δscore| {np.abs(scores - reference).max():5.2f} | "
+            f"spearman {spearman:.5f} | top-100 kept {top:3d}"
+        )
+
+    for r, (chunks, proj) in zip(resumes, originals):
+        r["chunk_embeddings"], r["project_embedding"] = chunks, proj
+
+
+# =====================================================
+# RAG RETRIEVAL — FLAT VS HNSW
+# =====================================================
+def bench_ann(args):
+    import faiss
+    import numpy as np
+    from backend_step5_rag_chatbot import ann_ef_search, build_hnsw_index, hnsw_of
+
+    # one core, like a single API worker
+    faiss.omp_set_num_threads(1)
+
+    rng = np.random.default_rng(0)
+    dim, k, n_queries = 384, 5, 200
+
+    for n in (5000, 20000, 100000):
+        # clustered, like chunks of resumes sharing vocabulary
+        centers = rng.standard_normal((n // 50, dim)).astype(np.float32)
+        vectors = (
+            centers[rng.integers(0, len(centers), n)]
+            + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+        )
+        faiss.normalize_L2(vectors)
+        ids = np.arange(n, dtype=np.int64)
+
+        queries = vectors[rng.integers(0, n, n_queries)] + (
+            0.3 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+        )
+        faiss.normalize_L2(queries)
+
+        flat = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        flat.add_with_ids(vectors, ids)
+
+        start = time.perf_counter()
+        hnsw = build_hnsw_index(vectors, ids)
+        build = time.perf_counter() - start
+
+        def per_query(index):
+            # one query per call, as /rag_query searches
+            found = []
+            start = time.perf_counter()
+            for q in queries:
+                found.append(index.search(q[None], k)[1][0])
+            return np.array(found), (time.perf_counter() - start) / n_queries
+
+        truth, flat_t = per_query(flat)
+        print(
+            f"{n:>6} chunks | flat {flat_t * 1e3:6.3f} ms/query | "
+            f"HNSW build {build:5.1f}s"
+        )
+
+        auto = ann_ef_search(n)
+        for ef in sorted({64, 128, 256, 512, auto}):
+            hnsw_of(hnsw).hnsw.efSearch = ef
+            found, hnsw_t = per_query(hnsw)
+
+            recall = np.mean([
+                len(set(f) & set(t)) / k for f, t in zip(found, truth)
+            ])
+            print(
+                f"{'':>6}        | efSearch {ef:>4} {hnsw_t * 1e3:6.3f} ms/query | "
+                f"recall@{k} {recall:.3f}{'  ← default' if ef == auto else ''}"
+            )
+
+
+# =====================================================
+# CLI
+# =====================================================
+BENCHMARKS = {
+    "skills": bench_skills,
+    "embed": bench_embed,
+    "onnx": bench_onnx,
+    "rank": bench_rank,
+    "quant": bench_quant,
+    "ann": bench_ann,
+}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    args = ap.parse_args(argv)
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
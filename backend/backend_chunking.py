@@ -0,0 +1,75 @@
+import os
+import re
+
+# MiniLM sees at most 256 word pieces incl. [CLS]/[SEP]
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "254"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+# whitespace words per word piece, for the no-tokenizer fallback
+WORDS_PER_TOKEN = 0.75
+
+_WORD = re.compile(r"\S+")
+
+
+def token_offsets(text, tokenizer):
+    """
+    (start, end) character offsets of every word piece, or None when
+    the tokenizer can't report offsets (slow tokenizers, no tokenizer).
+
+    HF fast tokenizers are not re-entrant — share one only through
+    EmbeddingService.token_offsets(), which holds the model lock.
+    """
+    if tokenizer is None:
+        return None
+
+    try:
+        enc = tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False,
+        )
+    except (NotImplementedError, TypeError, ValueError, RuntimeError):
+        return None
+
+    return [(s, e) for s, e in enc["offset_mapping"] if e > s]
+
+
+def chunk_spans(
+    text,
+    offsets_of=None,
+    max_tokens=CHUNK_MAX_TOKENS,
+    overlap=CHUNK_OVERLAP_TOKENS,
+):
+    """
+    Split `text` into overlapping windows of at most `max_tokens` word
+    pieces → list of (start, end) character spans into `text`.
+
+    `offsets_of(text)` returns word-piece offsets (see token_offsets).
+    Without it, or when it returns None, whitespace words stand in for
+    tokens with a proportionally smaller budget.
+    """
+    if not text or not text.strip():
+        return []
+
+    offsets = offsets_of(text) if offsets_of else None
+
+    if offsets is None:
+        offsets = [m.span() for m in _WORD.finditer(text)]
+        max_tokens = max(1, int(max_tokens * WORDS_PER_TOKEN))
+        overlap = int(overlap * WORDS_PER_TOKEN)
+
+    if not offsets:
+        return []
+
+    step = max(1, max_tokens - overlap)
+    spans = []
+
+    for start in range(0, len(offsets), step):
+        window = offsets[start:start + max_tokens]
+        spans.append((window[0][0], window[-1][1]))
+
+        if start + max_tokens >= len(offsets):
+            break
+
+    return spans
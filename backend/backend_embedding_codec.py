@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+
+# storage precision of resume / chunk vectors: float32 | float16 | int8
+EMBED_PRECISION = os.getenv("EMBED_PRECISION", "float32")
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+class QuantizedVectors:
+    """
+    int8 codes with one float32 scale per vector (symmetric, max-abs).
+    A (dim,) vector has a scalar scale, an (n, dim) matrix n scales.
+    """
+
+    __slots__ = ("codes", "scale")
+
+    def __init__(self, codes, scale):
+        self.codes = codes
+        self.scale = scale
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.scale.nbytes
+
+    def __len__(self):
+        return len(self.codes)
+
+
+# =====================================================
+# ENCODE / DECODE
+# =====================================================
+def encode_vectors(vectors, precision=EMBED_PRECISION):
+    """
+    float vectors → stored form for `precision`. Works on a single
+    (dim,) vector or an (n, dim) matrix.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    if precision == "float32":
+        return vectors
+
+    if precision == "float16":
+        return vectors.astype(np.float16)
+
+    if precision == "int8":
+        scale = np.abs(vectors).max(axis=-1) / 127.0
+        scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+
+        codes = np.rint(vectors / scale[..., None]).astype(np.int8)
+        return QuantizedVectors(codes, scale)
+
+    raise ValueError(f"Unknown embedding precision: {precision}")
+
+
+def decode_vectors(stored):
+    """
+    Any stored form (float32 / float16 array, QuantizedVectors, or a
+    plain list) → float32 ndarray of the same shape.
+    """
+    if isinstance(stored, QuantizedVectors):
+        return stored.codes.astype(np.float32) * stored.scale[..., None]
+
+    return np.asarray(stored, dtype=np.float32)
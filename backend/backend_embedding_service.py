@@ -0,0 +1,173 @@
+import os
+import threading
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+from backend_chunking import token_offsets
+from backend_embedding_store import EMBED_STORE_DIR, EmbeddingStore, text_key
+
+EMBED_MODEL_NAME = os.getenv(
+    "EMBED_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2"
+)
+# torch | onnx (ONNX Runtime, see backend_onnx_encoder). onnx is
+# experimental until `python backend_benchmarks.py onnx` passes against
+# the real all-MiniLM-L6-v2 weights.
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+# 0 → leave torch's default thread count alone
+EMBED_TORCH_THREADS = int(os.getenv("EMBED_TORCH_THREADS", "0"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+
+class EmbeddingService:
+    """
+    Process-wide embedding model.
+
+    Loaded once, warmed with a dummy encode, and shared by the
+    pipeline, the ranker and the RAG chatbot. encode() keeps the
+    SentenceTransformer signature so callers don't change, whichever
+    backend runs the model.
+    """
+
+    def __init__(
+        self,
+        model_name=EMBED_MODEL_NAME,
+        torch_threads=EMBED_TORCH_THREADS,
+        backend=EMBED_BACKEND,
+    ):
+        if torch_threads > 0:
+            torch.set_num_threads(torch_threads)
+
+        self.model_name = model_name
+
+        if backend == "torch":
+            self.model = SentenceTransformer(model_name)
+            self.variant = model_name
+        elif backend == "onnx":
+            # optional dependency — only needed for this backend
+            from backend_onnx_encoder import OnnxSentenceEncoder
+
+            self.model = OnnxSentenceEncoder(model_name)
+            self.variant = f"{model_name}@{self.model.variant}"
+        else:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+
+        self._lock = threading.Lock()
+
+        # persistent vectors keyed by text hash ("" disables); keyed by
+        # variant so torch and quantized ONNX vectors never mix
+        self.store = (
+            EmbeddingStore(
+                EMBED_STORE_DIR,
+                self.variant,
+                self.get_sentence_embedding_dimension(),
+            )
+            if EMBED_STORE_DIR else None
+        )
+
+        self.warmup()
+
+    # -------------------------------------------------
+    def warmup(self):
+        self.encode(["warmup"], normalize_embeddings=True)
+        print(f"[EMBEDDER] {self.variant} loaded and warmed")
+
+    # -------------------------------------------------
+    def encode(self, sentences, **kwargs):
+        kwargs.setdefault("show_progress_bar", False)
+
+        with self._lock:
+            return self.model.encode(sentences, **kwargs)
+
+    # =================================================
+    # 🔥 BATCHED ENCODING
+    # =================================================
+    def encode_batched(self, texts, batch_size=EMBED_BATCH_SIZE, bucket=True):
+        """
+        Encode many texts in fixed-size batches → float32 (N, dim),
+        L2-normalized, rows in input order.
+
+        With `bucket`, texts are length-sorted first so each batch pads
+        to similar lengths; vectors are scattered back afterwards. The
+        lock is taken per batch, so queries can interleave with a big
+        ingestion.
+        """
+        dim = self.get_sentence_embedding_dimension()
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+
+        if not texts:
+            return out
+
+        order = list(range(len(texts)))
+        if bucket:
+            order.sort(key=lambda i: len(texts[i]))
+
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+
+            vecs = self.encode(
+                [texts[i] for i in idx],
+                batch_size=len(idx),
+                normalize_embeddings=True,
+            )
+            out[idx] = np.asarray(vecs, dtype=np.float32)
+
+        return out
+
+    # =================================================
+    # 🔥 STORE-BACKED ENCODING
+    # =================================================
+    def embed(self, texts):
+        """
+        Same result as encode_batched(), but vectors already in the
+        on-disk store are reused; only unseen texts hit the model.
+        """
+        if self.store is None:
+            return self.encode_batched(texts)
+
+        keys = [text_key(t) for t in texts]
+        found = self.store.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = self.encode_batched(list(missing.values()))
+            self.store.put_many(list(missing), vectors)
+            found.update(zip(missing, vectors))
+
+        out = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for i, key in enumerate(keys):
+            out[i] = found[key]
+
+        return out
+
+    # -------------------------------------------------
+    def token_offsets(self, text):
+        # the only way in to the tokenizer — encode() reconfigures the
+        # same (non-reentrant) Rust tokenizer, so share its lock
+        with self._lock:
+            return token_offsets(text, getattr(self.model, "tokenizer", None))
+
+    # -------------------------------------------------
+    def get_sentence_embedding_dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+
+# =====================================================
+# PROCESS-WIDE SHARED SERVICE
+# =====================================================
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def get_embedder():
+    global _shared_service
+
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = EmbeddingService()
+        return _shared_service
@@ -0,0 +1,156 @@
+import os
+import re
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows — single-process locking only
+    fcntl = None
+
+EMBED_STORE_DIR = os.getenv("EMBED_STORE_DIR", ".embedding_store")
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent, append-only embedding store keyed by text hash.
+
+    - vectors.f32 : raw float32 rows, only ever appended
+    - index.tsv   : "<sha256>\\t<row>" lines, written after their rows
+
+    Readers memory-map the matrix, so several worker processes share
+    the same pages without copying. Writers append under a file lock.
+    """
+
+    def __init__(self, directory, model_name, dim):
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.directory = os.path.join(directory, safe_model)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.tsv")
+        self.lock_path = os.path.join(self.directory, ".lock")
+
+        self.rows = {}
+        self._index_offset = 0
+        self._matrix = None
+        self._lock = threading.Lock()
+
+        for path in (self.vectors_path, self.index_path):
+            open(path, "ab").close()
+
+    # =================================================
+    # SYNC WITH DISK
+    # =================================================
+    def _refresh(self):
+        # tail the index — only complete lines
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            # a torn line from a crashed writer is skipped, not fatal
+            parts = line.split(b"\t")
+            if len(parts) != 2 or len(parts[0]) != 64 or not parts[1].isdigit():
+                continue
+            self.rows[parts[0].decode("ascii")] = int(parts[1])
+        self._index_offset += end
+
+        n_rows = os.path.getsize(self.vectors_path) // self.row_bytes
+        if n_rows and (self._matrix is None or self._matrix.shape[0] < n_rows):
+            self._matrix = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(n_rows, self.dim),
+            )
+
+    # -------------------------------------------------
+    @contextmanager
+    def _file_lock(self):
+        # serializes appends across processes
+        with open(self.lock_path, "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    # -------------------------------------------------
+    def _repair_tails(self):
+        """
+        Undo a writer that crashed mid-append (caller holds the file
+        lock): drop a partial trailing row so new rows stay aligned,
+        and end a torn index line so the next one isn't merged into it.
+        """
+        size = os.path.getsize(self.vectors_path)
+        if size % self.row_bytes:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(size - size % self.row_bytes)
+
+        with open(self.index_path, "r+b") as f:
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    # =================================================
+    # LOOKUP
+    # =================================================
+    def get_many(self, keys):
+        """
+        key → read-only memmap row, for the keys present.
+        """
+        with self._lock:
+            if any(k not in self.rows for k in keys):
+                self._refresh()
+
+            return {
+                k: self._matrix[self.rows[k]]
+                for k in keys
+                if k in self.rows
+            }
+
+    # =================================================
+    # APPEND
+    # =================================================
+    def put_many(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+
+        with self._lock, self._file_lock():
+            self._refresh()
+
+            fresh = {}
+            for k, v in zip(keys, vectors):
+                if k not in self.rows and k not in fresh:
+                    fresh[k] = v
+
+            if not fresh:
+                return
+
+            self._repair_tails()
+
+            with open(self.vectors_path, "ab") as f:
+                start = f.tell() // self.row_bytes
+                f.write(np.stack(list(fresh.values())).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self.index_path, "ab") as f:
+                f.write("".join(
+                    f"{k}\t{start + i}\n" for i, k in enumerate(fresh)
+                ).encode("ascii"))
+
+            self._refresh()
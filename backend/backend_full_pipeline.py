@@ -1,10 +1,21 @@
+import os
+import threading
+
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 
+from backend_chunking import chunk_spans
+from backend_embedding_codec import encode_vectors
+from backend_embedding_service import get_embedder
+from backend_parse_cache import ParseCache, file_sha256
 from backend_step0_jd_structurer import JDStructurer
 from backend_step2_resume_parser import ResumeParser
-from backend_step3_ranking import ResumeRanker
-from backend_step5_rag_chatbot import ResumeRAGChatbot
+from backend_step3_ranking import RankingCache, ResumeRanker
+from backend_step5_rag_chatbot import (
+    RAG_SNAPSHOT_DIR,
+    RAG_SNAPSHOT_INTERVAL,
+    ResumeRAGChatbot,
+)
 
 
 class ResumeScreeningAI:
@@ -15,15 +26,24 @@ class ResumeScreeningAI:
     # -----------------------------------------------------
     # INIT
     # -----------------------------------------------------
-    def __init__(self, jd_text, resume_folder, sender_email, sender_password):
-        self.embedder = SentenceTransformer(
-            "sentence-transformers/all-MiniLM-L6-v2"
-        )
+    def __init__(
+        self,
+        jd_text,
+        resume_folder,
+        sender_email,
+        sender_password,
+        jd_schema=None,
+        snapshot_dir=RAG_SNAPSHOT_DIR,
+        refresh=True,
+    ):
+        # shared, already-warm model — no per-session load
+        self.embedder = get_embedder()
 
         self.jd_text = jd_text
-        self.jd_schema = JDStructurer.structure(jd_text)
+        # a restored session passes its saved schema → no LLM call
+        self.jd_schema = jd_schema or JDStructurer.structure(jd_text)
 
-        self.parser = ResumeParser(resume_folder)
+        self.parser = ResumeParser(resume_folder, cache=ParseCache())
 
         self.ranker = ResumeRanker(
             self.embedder,
@@ -31,90 +51,517 @@ class ResumeScreeningAI:
             self.jd_schema
         )
 
+        self.resume_folder = resume_folder
+        self.resume_hashes = {}
         self.parsed_resumes = []
-        self.chatbot = None
+        self.snapshot_dir = snapshot_dir
         self.latest_ranking = None
 
-        self.refresh_resumes()
+        # on-disk RAG snapshot → chatbot answers before any refresh
+        self.chatbot = (
+            ResumeRAGChatbot.load_snapshot(snapshot_dir, self.jd_schema, self.embedder)
+            if snapshot_dir else None
+        )
+
+        self.ranking = RankingCache(
+            RankingCache.fingerprint(jd_text, self.jd_schema)
+        )
+
+        self._refresh_lock = threading.Lock()
+        self._chatbot_lock = threading.Lock()
+        self._rank_lock = threading.Lock()
+        self._latest_ranking_version = None
+        self._synced_resumes = None
+        self._snapshot_timer = None
+
+        # multi-JD mode — the session JD plus any added requisitions
+        self.primary_jd_id = self.ranking.jd_fingerprint[:12]
+        self.jds = {
+            self.primary_jd_id: {
+                "title": "Primary JD",
+                "jd_text": jd_text,
+                "jd_schema": self.jd_schema,
+                "ranker": self.ranker,
+            }
+        }
+        self._jd_matrix = None
+
+        if refresh:
+            self.refresh_resumes()
+
+    # -----------------------------------------------------
+    # RANKING FEATURES — ONCE PER RESUME
+    # -----------------------------------------------------
+    def _build_features(self, resumes):
+        for r in resumes:
+            try:
+                r["features"] = ResumeRanker.build_features(r)
+            except Exception as e:
+                # the ranker reports and zero-scores it at rank time
+                print(f"[FEATURES ERROR] {r.get('name')}: {e}")
 
     # -----------------------------------------------------
-    # REFRESH RESUMES
+    # EMBED RESUMES
     # -----------------------------------------------------
-    def refresh_resumes(self):
-        self.parsed_resumes = self.parser.parse_resumes()
+    def _embed_resumes(self, resumes):
+        """
+        One batched encode for every chunk and project section of the
+        pending resumes, scattered back onto them.
+
+        Each resume gets:
+        - chunk_spans      : (start, end) character spans into its text
+        - chunk_embeddings : (n_chunks, dim) matrix, one row per span
+        - text_embedding   : normalized mean of the chunk rows
+
+        Vectors are stored at EMBED_PRECISION (float32 / float16 / int8).
+        """
+        offsets_of = getattr(self.embedder, "token_offsets", None)
+
+        texts = []
+        chunk_rows = []
+        project_rows = []
+
+        for r in resumes:
+            r["text_embedding"] = None
+            r["project_embedding"] = None
+            r["chunk_embeddings"] = None
 
-        # 🔥 embedding cache
-        for r in self.parsed_resumes:
             text = r.get("text", "")
-            projects = r.get("projects_text", "")
+            r["chunk_spans"] = chunk_spans(text, offsets_of)
 
-            try:
-                r["text_embedding"] = self.embedder.encode(
-                    [text],
-                    normalize_embeddings=True
-                )[0]
-            except Exception:
-                r["text_embedding"] = None
+            start = len(texts)
+            texts.extend(text[s:e] for s, e in r["chunk_spans"])
+            chunk_rows.append((r, start, len(texts)))
 
-            try:
-                if projects:
-                    r["project_embedding"] = self.embedder.encode(
-                        [projects],
-                        normalize_embeddings=True
-                    )[0]
+            if r.get("projects_text"):
+                project_rows.append((r, len(texts)))
+                texts.append(r["projects_text"])
+
+        if not texts:
+            return
+
+        try:
+            vectors = self.embedder.embed(texts)
+        except Exception as e:
+            print(f"[EMBED ERROR] batch of {len(texts)}: {e}")
+            return
+
+        for r, lo, hi in chunk_rows:
+            if hi == lo:
+                continue
+
+            chunks = vectors[lo:hi]
+            mean = chunks.mean(axis=0)
+
+            r["chunk_embeddings"] = encode_vectors(chunks)
+            r["text_embedding"] = encode_vectors(
+                mean / max(np.linalg.norm(mean), 1e-12)
+            )
+
+        for r, i in project_rows:
+            r["project_embedding"] = encode_vectors(vectors[i])
+
+    # -----------------------------------------------------
+    # REFRESH RESUMES — INCREMENTAL
+    # -----------------------------------------------------
+    def refresh_resumes(self, progress=None):
+        """
+        Sync the parsed set with the resume folder.
+
+        Only new or changed files (by content hash) are parsed and
+        embedded; removed files are dropped. `progress(file, status)`
+        receives per-file updates. Safe to call from worker threads:
+        refreshes are serialized and readers always see a consistent
+        list (it is rebound, never mutated in place).
+        """
+        notify = progress or (lambda file, status: None)
+
+        with self._refresh_lock:
+            current = {}
+            for file in self.parser.list_resume_files():
+                try:
+                    current[file] = file_sha256(
+                        os.path.join(self.resume_folder, file)
+                    )
+                except OSError as e:
+                    print(f"[REFRESH] Cannot read {file}: {e}")
+
+            stale = {
+                f for f, h in self.resume_hashes.items()
+                if current.get(f) != h
+            }
+
+            kept = [
+                r for r in self.parsed_resumes
+                if r.get("source_file") not in stale
+            ]
+            hashes = {
+                f: h for f, h in self.resume_hashes.items()
+                if f not in stale
+            }
+
+            known = {r["content_hash"] for r in kept}
+            pending = []
+
+            for file, digest in current.items():
+                if file in hashes:
+                    continue
+                if digest in known:
+                    print(f"[REFRESH] Duplicate content skipped: {file}")
+                    notify(file, "duplicate")
+                    continue
+                known.add(digest)
+                pending.append(file)
+
+            for file in pending:
+                notify(file, "parsing")
+
+            new_resumes = (
+                self.parser.parse_resumes(
+                    pending,
+                    current,
+                    on_file=lambda f, ok: notify(f, "embedding" if ok else "failed"),
+                )
+                if pending else []
+            )
+
+            for r in new_resumes:
+                r["content_hash"] = current[r["source_file"]]
+
+            # files that yielded no text are remembered too, so they are
+            # not re-extracted on every refresh
+            for file in pending:
+                hashes[file] = current[file]
+
+            self._build_features(new_resumes)
+            self._embed_resumes(new_resumes)
+
+            self.parsed_resumes = kept + new_resumes
+            self.resume_hashes = hashes
+
+            # update chatbot in place — only changed resumes touch FAISS
+            with self._chatbot_lock:
+                if self.chatbot is None:
+                    self.chatbot = ResumeRAGChatbot(
+                        self.parsed_resumes,
+                        self.jd_schema,
+                        self.embedder
+                    )
                 else:
-                    r["project_embedding"] = None
-            except Exception:
-                r["project_embedding"] = None
-
-        # rebuild chatbot
-        self.chatbot = ResumeRAGChatbot(
-            self.parsed_resumes,
-            self.jd_schema,
-            self.embedder
-        )
+                    # reconcile by id — also fixes up a loaded snapshot
+                    wanted = {r["content_hash"] for r in self.parsed_resumes}
+                    indexed = self.chatbot.resume_ids()
+
+                    for key in indexed - wanted:
+                        self.chatbot.remove_resume(key)
+                    self.chatbot.add_resumes([
+                        r for r in self.parsed_resumes
+                        if r["content_hash"] not in indexed
+                    ])
+
+                self._schedule_snapshot()
+
+            for r in new_resumes:
+                notify(r["source_file"], "indexed")
+
+            print(
+                f"[REFRESH] +{len(new_resumes)} new, -{len(stale)} removed, "
+                f"{len(self.parsed_resumes)} total"
+            )
+
+    # -----------------------------------------------------
+    # FILE STATUS
+    # -----------------------------------------------------
+    def file_status(self, file):
+        if file not in self.resume_hashes:
+            return "duplicate"
+
+        if any(r.get("source_file") == file for r in self.parsed_resumes):
+            return "indexed"
+
+        return "failed"
 
     # -----------------------------------------------------
     # 🔥 RANKING — PRODUCTION SAFE
     # -----------------------------------------------------
     def rank_resumes(self):
-        if not self.parsed_resumes:
-            return pd.DataFrame()
+        """
+        Ranked candidates as a DataFrame. Scores come from the
+        incremental RankingCache; an unchanged pool returns the cached
+        frame as-is.
+        """
+        with self._rank_lock:
+            try:
+                self._sync_ranking()
+            except Exception as e:
+                print(f"[RANK ERROR] batch: {e}")
+                return pd.DataFrame()
+
+            if (
+                self.latest_ranking is not None
+                and self._latest_ranking_version == self.ranking.version
+            ):
+                return self.latest_ranking
+
+            # component columns ride along for chatbot explanations
+            rows = [
+                {
+                    **self._ranking_row(r, score),
+                    **(self.ranking.components_of(r["content_hash"]) or {}),
+                }
+                for r, score in self.ranking.ordered()
+            ]
+
+            df = pd.DataFrame(rows)
 
-        rows = []
+            if not df.empty:
+                # =========================================
+                # ✅ CRITICAL FIX — REMOVE MIN-MAX NORMALIZATION
+                # =========================================
+                # The ranker already outputs calibrated percentages.
+                # We only clip to safe bounds to avoid UI anomalies.
+                df["score"] = df["score"].clip(0, 100).round(2)
+
+            # cache ranking for chatbot + unchanged-pool requests
+            self.latest_ranking = df
+            self._latest_ranking_version = self.ranking.version
+
+            return df
 
-        for r in self.parsed_resumes:
+    # -----------------------------------------------------
+    def _sync_ranking(self):
+        # caller holds _rank_lock. refresh_resumes swaps in a new list
+        # whenever the pool changes → same list, nothing to sync (O(1))
+        resumes = self.parsed_resumes
+        if resumes is self._synced_resumes:
+            return
+
+        self.ranking.sync(resumes, self.ranker)
+        self._synced_resumes = resumes
+
+    # -----------------------------------------------------
+    def rank_page(
+        self, limit=None, offset=0, min_score=None,
+        sort_by=None, include_components=False,
+    ):
+        """
+        One page of the ranking → (rows, total, ranking_version). Reads
+        straight from the sorted RankingCache, so cost tracks the page
+        size rather than the pool size. `sort_by` orders by one score
+        component. The version is read under the same lock as the rows,
+        so it always describes them.
+        """
+        with self._rank_lock:
             try:
-                score = self.ranker.score_resume(r)
+                self._sync_ranking()
             except Exception as e:
-                print(f"[RANK ERROR] {r.get('name')}: {e}")
-                score = 0
-
-            rows.append({
-                "name": r.get("name", "Unknown Candidate"),
-                "email": r.get("email", "N/A"),
-                "score": score,
-                "role": "Candidate"
+                print(f"[RANK ERROR] batch: {e}")
+                # no version → the empty page is never cached
+                return [], 0, None
+
+            pairs, total = self.ranking.page(offset, limit, min_score, sort_by)
+
+            rows = [
+                {"rank": offset + i + 1, **self._ranking_row(r, score)}
+                for i, (r, score) in enumerate(pairs)
+            ]
+
+            if include_components:
+                for row, (r, _) in zip(rows, pairs):
+                    row["components"] = self.ranking.components_of(r["content_hash"])
+
+            return rows, total, self.ranking_version
+
+    @staticmethod
+    def _ranking_row(resume, score):
+        return {
+            "name": resume.get("name", "Unknown Candidate"),
+            "email": resume.get("email", "N/A"),
+            "score": round(min(max(score, 0.0), 100.0), 2),
+            "role": "Candidate"
+        }
+
+    @property
+    def ranking_version(self):
+        return f"{self.ranking.jd_fingerprint[:12]}-{self.ranking.version}"
+
+    # -----------------------------------------------------
+    # MULTI-JD — ONE POOL, MANY REQUISITIONS
+    # -----------------------------------------------------
+    def add_jd(self, jd_text, title=None, jd_schema=None):
+        """
+        Register another JD against the same resume pool → jd_id.
+        Identical JDs share an id, so re-adding is a no-op. A restored
+        session passes the saved schema → no LLM call.
+        """
+        if not jd_text or not jd_text.strip():
+            raise ValueError("JD text is empty")
+
+        # same text already registered → skip the structuring LLM call
+        with self._rank_lock:
+            for jd_id, jd in self.jds.items():
+                if jd["jd_text"] == jd_text:
+                    return jd_id
+
+        jd_schema = jd_schema or JDStructurer.structure(jd_text)
+        jd_id = RankingCache.fingerprint(jd_text, jd_schema)[:12]
+
+        ranker = ResumeRanker(self.embedder, jd_text, jd_schema)
+
+        with self._rank_lock:
+            self.jds.setdefault(jd_id, {
+                "title": title or jd_text.strip().splitlines()[0][:80],
+                "jd_text": jd_text,
+                "jd_schema": jd_schema,
+                "ranker": ranker,
             })
 
-        df = pd.DataFrame(rows)
+        return jd_id
 
-        if df.empty:
-            return df
+    def remove_jd(self, jd_id):
+        if jd_id == self.primary_jd_id:
+            raise ValueError("The session JD cannot be removed")
+
+        with self._rank_lock:
+            return self.jds.pop(jd_id, None) is not None
 
-        # =================================================
-        # ✅ CRITICAL FIX — REMOVE MIN-MAX NORMALIZATION
-        # =================================================
-        # The ranker already outputs calibrated percentages.
-        # We only clip to safe bounds to avoid UI anomalies.
-        df["score"] = df["score"].clip(0, 100).round(2)
+    def list_jds(self):
+        return [
+            {
+                "jd_id": jd_id,
+                "title": jd["title"],
+                "primary": jd_id == self.primary_jd_id,
+                "core_skills": jd["jd_schema"].get("core_skills", []),
+            }
+            for jd_id, jd in list(self.jds.items())
+        ]
 
-        df = df.sort_values("score", ascending=False).reset_index(drop=True)
+    def added_jds(self):
+        # everything but the session JD, for the session file
+        with self._rank_lock:
+            return [
+                {
+                    "jd_text": jd["jd_text"],
+                    "title": jd["title"],
+                    "jd_schema": jd["jd_schema"],
+                }
+                for jd_id, jd in self.jds.items()
+                if jd_id != self.primary_jd_id
+            ]
 
-        # cache ranking for chatbot
-        self.latest_ranking = df.copy()
+    # -----------------------------------------------------
+    def _jd_score_matrix(self):
+        """
+        (jd_ids, titles, resumes, scores) with scores a (J, N) array.
+        Recomputed only when the JD set or the resume pool changes.
+        """
+        with self._rank_lock:
+            resumes = self.parsed_resumes
+            jd_ids = list(self.jds)
+
+            cached = self._jd_matrix
+            if cached and cached[0] == jd_ids and cached[2] is resumes:
+                return cached
+
+            # titles read here, under the lock — a JD may be removed
+            # while the caller formats the result
+            titles = [self.jds[j]["title"] for j in jd_ids]
+            rankers = [self.jds[j]["ranker"] for j in jd_ids]
+            scores = np.array(
+                ResumeRanker.score_matrix(rankers, resumes), dtype=np.float64
+            ).reshape(len(jd_ids), len(resumes))
+
+            self._jd_matrix = (jd_ids, titles, resumes, np.clip(scores, 0, 100))
+            return self._jd_matrix
+
+    @staticmethod
+    def _top_indices(values, limit=None):
+        # best-first indices; partial selection when only the top is needed
+        if limit is not None and limit < len(values):
+            top = np.argpartition(-values, limit - 1)[:limit]
+            return top[np.argsort(-values[top], kind="stable")]
+
+        return np.argsort(-values, kind="stable")
+
+    def rank_multi_jd(self, mode="per_jd", limit=None):
+        """
+        - per_jd  : one ranking per JD
+        - best_jd : one row per candidate with its best-matching JD
+        """
+        jd_ids, titles, resumes, scores = self._jd_score_matrix()
+
+        if mode == "per_jd":
+            return [
+                {
+                    "jd_id": jd_id,
+                    "title": titles[j],
+                    "candidates": [
+                        {"rank": k + 1, **self._ranking_row(resumes[i], scores[j, i])}
+                        for k, i in enumerate(self._top_indices(scores[j], limit))
+                    ],
+                }
+                for j, jd_id in enumerate(jd_ids)
+            ]
+
+        if mode == "best_jd":
+            best = scores.argmax(axis=0)
+            best_scores = scores[best, np.arange(len(resumes))]
+
+            return [
+                {
+                    "rank": k + 1,
+                    **self._ranking_row(resumes[i], best_scores[i]),
+                    "best_jd_id": jd_ids[best[i]],
+                    "best_jd_title": titles[best[i]],
+                    "scores": {
+                        jd_id: round(float(scores[j, i]), 2)
+                        for j, jd_id in enumerate(jd_ids)
+                    },
+                }
+                for k, i in enumerate(self._top_indices(best_scores, limit))
+            ]
+
+        raise ValueError(f"Unknown multi-JD mode: {mode}")
+
+    # -----------------------------------------------------
+    # RAG SNAPSHOT — DEBOUNCED
+    # -----------------------------------------------------
+    def _schedule_snapshot(self):
+        # caller holds _chatbot_lock; a burst of uploads → one write
+        if not self.snapshot_dir or self._snapshot_timer is not None:
+            return
+
+        self._snapshot_timer = threading.Timer(
+            RAG_SNAPSHOT_INTERVAL, self.save_snapshot
+        )
+        self._snapshot_timer.daemon = True
+        self._snapshot_timer.start()
+
+    def save_snapshot(self):
+        """
+        Write the chatbot snapshot now, including any pending
+        debounced write. Called on shutdown too.
+        """
+        with self._chatbot_lock:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+                self._snapshot_timer = None
+
+            if not (self.chatbot and self.snapshot_dir):
+                return
+
+            try:
+                self.chatbot.save_snapshot(self.snapshot_dir)
+            except (OSError, RuntimeError) as e:
+                print(f"[RAG] snapshot not saved: {e}")
 
-        return df
+    def close(self):
+        # discarded pipeline (reset) → drop a pending write, never save
+        with self._chatbot_lock:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+                self._snapshot_timer = None
+            self.snapshot_dir = None
 
     # -----------------------------------------------------
     # CHATBOT
@@ -123,9 +570,29 @@ class ResumeScreeningAI:
         if not self.chatbot:
             return "No resumes available yet."
 
-        return self.chatbot.generate_response(
-            user_query=query,
-            top_k=top_k,
-            chat_history=chat_history or [],
-            ranking_df=self.latest_ranking,
-        )
\ No newline at end of file
+        # lock covers routing, retrieval and the answer cache only — the
+        # LLM call runs unlocked so queries and ingestion don't queue on it
+        with self._chatbot_lock:
+            chatbot = self.chatbot
+
+            # ranking requested at least once → keep it current
+            ranking_df = self.rank_resumes() if self.ranking.version else None
+
+            answer, pending = chatbot.prepare_response(
+                user_query=query,
+                top_k=top_k,
+                chat_history=chat_history or [],
+                ranking_df=ranking_df,
+                # part of the answer-cache key, read after the re-rank
+                ranking_version=self.ranking_version if ranking_df is not None else None,
+            )
+
+        if pending is None:
+            return answer
+
+        answer = chatbot.complete_response(pending)
+
+        with self._chatbot_lock:
+            chatbot.remember_response(pending, answer)
+
+        return answer
\ No newline at end of file
@@ -0,0 +1,243 @@
+import os
+import re
+import time
+import random
+import asyncio
+import threading
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+GROQ_REQUEST_TIMEOUT = float(os.getenv("GROQ_REQUEST_TIMEOUT", "25"))
+GROQ_BATCH_DEADLINE = float(os.getenv("GROQ_BATCH_DEADLINE", "90"))
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _parse_reset(value):
+    """
+    Groq reset headers look like "2.5s", "1m3.2s" or "250ms";
+    Retry-After is plain seconds.
+    """
+    if not value:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+
+    return total or None
+
+
+class GroqClient:
+    """
+    Shared, connection-pooled async client for Groq chat completions.
+
+    - One httpx.AsyncClient on a private event-loop thread
+    - Concurrency capped by a semaphore
+    - Honors Retry-After / x-ratelimit-* headers
+    - Exponential backoff with jitter on 429, 5xx and transport errors
+    - Overall deadline per batch
+
+    Sync callers use chat() / chat_many(); `base_url` can point at a
+    local fake server for testing.
+    """
+
+    def __init__(
+        self,
+        api_key=GROQ_API_KEY,
+        base_url=GROQ_BASE_URL,
+        max_concurrency=GROQ_MAX_CONCURRENCY,
+        max_retries=GROQ_MAX_RETRIES,
+        request_timeout=GROQ_REQUEST_TIMEOUT,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._paused_until = 0.0
+        self._start_lock = threading.Lock()
+
+    # =================================================
+    # EVENT LOOP THREAD
+    # =================================================
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=self.request_timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency,
+                    ),
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                    },
+                )
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run, name="groq-client", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+
+    # -------------------------------------------------
+    def close(self):
+        if self._loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(
+            self._client.aclose(), self._loop
+        ).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    # =================================================
+    # RATE LIMITS
+    # =================================================
+    def _observe_limits(self, res):
+        loop_now = self._loop.time()
+
+        wait = _parse_reset(res.headers.get("retry-after"))
+
+        if wait is None and res.headers.get("x-ratelimit-remaining-requests") == "0":
+            wait = _parse_reset(res.headers.get("x-ratelimit-reset-requests"))
+
+        if wait is None and res.headers.get("x-ratelimit-remaining-tokens") == "0":
+            wait = _parse_reset(res.headers.get("x-ratelimit-reset-tokens"))
+
+        if wait:
+            # pause every request sharing this client, not just this one
+            self._paused_until = max(self._paused_until, loop_now + wait)
+
+        return wait
+
+    # =================================================
+    # SINGLE REQUEST WITH RETRIES
+    # =================================================
+    async def _post(self, payload, deadline):
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                pause = self._paused_until - loop.time()
+                if pause > 0:
+                    await asyncio.sleep(min(pause, max(deadline - loop.time(), 0)))
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError("Groq batch deadline exceeded")
+
+                try:
+                    res = await self._client.post(
+                        "/chat/completions",
+                        json=payload,
+                        timeout=min(self.request_timeout, remaining),
+                    )
+                except httpx.TransportError as e:
+                    res, error, wait = None, e, None
+                else:
+                    error = None
+                    wait = self._observe_limits(res)
+
+                    if res.status_code not in RETRY_STATUS:
+                        res.raise_for_status()
+                        return res.json()["choices"][0]["message"]["content"]
+
+            if attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                res.raise_for_status()
+
+            backoff = (0.5 * 2 ** attempt) * (0.5 + random.random())
+            if wait:
+                backoff = max(backoff, wait)
+
+            if loop.time() + backoff >= deadline:
+                raise TimeoutError("Groq batch deadline exceeded")
+
+            await asyncio.sleep(backoff)
+
+    # -------------------------------------------------
+    async def _post_many(self, payloads, deadline):
+        return await asyncio.gather(
+            *(self._post(p, deadline) for p in payloads),
+            return_exceptions=True,
+        )
+
+    # =================================================
+    # SYNC ENTRY POINTS
+    # =================================================
+    def chat_many(self, payloads, deadline=GROQ_BATCH_DEADLINE):
+        """
+        Send all payloads concurrently. Returns one entry per payload:
+        the message content, or the exception that request ended with.
+        """
+        if not payloads:
+            return []
+
+        self._ensure_started()
+
+        start = time.monotonic()
+
+        async def run():
+            loop_deadline = asyncio.get_running_loop().time() + deadline
+            return await self._post_many(payloads, loop_deadline)
+
+        future = asyncio.run_coroutine_threadsafe(run(), self._loop)
+        results = future.result()
+
+        print(
+            f"[GROQ] {len(payloads)} requests in "
+            f"{time.monotonic() - start:.2f}s"
+        )
+        return results
+
+    def chat(self, payload, deadline=GROQ_REQUEST_TIMEOUT):
+        result = self.chat_many([payload], deadline)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+# =====================================================
+# PROCESS-WIDE SHARED CLIENT
+# =====================================================
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_groq_client():
+    global _shared_client
+
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = GroqClient()
+        return _shared_client
@@ -0,0 +1,114 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "200"))
+
+
+class IngestionJob:
+    """
+    One background ingestion run with per-file progress.
+
+    status: queued → running → done | failed
+    """
+
+    def __init__(self, files):
+        self.id = str(uuid.uuid4())
+        self.status = "queued"
+        self.files = {f: "queued" for f in files}
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------
+    def update_file(self, file, status):
+        with self._lock:
+            if file in self.files:
+                self.files[file] = status
+
+    # -------------------------------------------------
+    def to_dict(self):
+        with self._lock:
+            files = dict(self.files)
+
+        finished = sum(
+            s in ("indexed", "duplicate", "failed") for s in files.values()
+        )
+
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": {"done": finished, "total": len(files)},
+            "files": files,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Local worker pool for blocking ingestion work (PDF parsing, OCR,
+    LLM fallbacks, embedding) so request handlers return immediately.
+    """
+
+    def __init__(self, workers=INGEST_WORKERS):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers),
+            thread_name_prefix="ingest",
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    # =================================================
+    # SUBMIT
+    # =================================================
+    def submit(self, files, fn):
+        """
+        Queue `fn(job)`; it should report per-file progress through
+        `job.update_file(file, status)`.
+        """
+        job = IngestionJob(files)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    # -------------------------------------------------
+    def _run(self, job, fn):
+        job.status = "running"
+
+        try:
+            fn(job)
+            job.status = "done"
+        except Exception as e:
+            print(f"[JOB ERROR] {job.id}: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    # -------------------------------------------------
+    def _trim(self):
+        # forget the oldest finished jobs beyond the history limit
+        finished = [
+            j for j in self._jobs.values() if j.finished_at is not None
+        ]
+        finished.sort(key=lambda j: j.finished_at)
+
+        while len(self._jobs) > JOB_HISTORY_LIMIT and finished:
+            del self._jobs[finished.pop(0).id]
+
+    # =================================================
+    # LOOKUP
+    # =================================================
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
@@ -0,0 +1,229 @@
+import os
+import re
+import json
+import inspect
+
+import numpy as np
+import onnxruntime as ort
+
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", ".onnx_models")
+# dynamic int8 weight quantization of the exported graph
+EMBED_ONNX_QUANTIZE = os.getenv("EMBED_ONNX_QUANTIZE", "0") == "1"
+# 0 → let ONNX Runtime pick
+EMBED_ONNX_THREADS = int(os.getenv("EMBED_ONNX_THREADS", "0"))
+
+INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+
+class OnnxSentenceEncoder:
+    """
+    Mean-pooling sentence encoder (e.g. all-MiniLM-L6-v2) on ONNX
+    Runtime, CPU only.
+
+    The transformer is exported from the SentenceTransformer model on
+    first use and cached under EMBED_ONNX_DIR; pooling and
+    normalization run in numpy. encode(), tokenizer and
+    get_sentence_embedding_dimension() mirror SentenceTransformer, so
+    EmbeddingService can use either.
+
+    Experimental: parity with torch has only been checked on a
+    randomly initialized model of the same architecture. Run
+    `python backend_benchmarks.py onnx` against the real weights
+    before enabling it.
+    """
+
+    def __init__(
+        self,
+        model_name,
+        cache_dir=EMBED_ONNX_DIR,
+        quantize=EMBED_ONNX_QUANTIZE,
+        threads=EMBED_ONNX_THREADS,
+    ):
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.directory = os.path.join(cache_dir, safe_model)
+        self.variant = "onnx-int8" if quantize else "onnx"
+
+        model_path = os.path.join(self.directory, "model.onnx")
+        meta_path = os.path.join(self.directory, "encoder.json")
+
+        if not os.path.exists(model_path):
+            self._export(model_name, model_path, meta_path)
+
+        if quantize:
+            model_path = self._quantize(model_path)
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.max_seq_length = meta["max_seq_length"]
+        self.normalize = meta["normalize"]
+        self._dim = meta["dim"]
+
+        from transformers import AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(self.directory)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads > 0:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = [i.name for i in self.session.get_inputs()]
+
+    # =================================================
+    # EXPORT / QUANTIZE — ONCE PER MODEL
+    # =================================================
+    def _export(self, model_name, model_path, meta_path):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        st = SentenceTransformer(model_name, device="cpu")
+
+        pooling = st[1]
+        # sentence-transformers < 6 uses flags, >= 6 a mode string
+        mean = getattr(pooling, "pooling_mode_mean_tokens", False) or (
+            getattr(pooling, "pooling_mode", None) == "mean"
+        )
+        if not mean:
+            raise ValueError(f"{model_name}: ONNX backend needs mean pooling")
+
+        class _Transformer(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, input_ids, attention_mask, token_type_ids):
+                return self.model(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    token_type_ids=token_type_ids,
+                ).last_hidden_state
+
+        sample = st.tokenizer(
+            ["export sample", "a slightly longer export sample"],
+            padding=True,
+            return_tensors="pt",
+        )
+        args = tuple(
+            sample.get(name, torch.zeros_like(sample["input_ids"]))
+            for name in INPUT_NAMES
+        )
+
+        # torch >= 2.9 defaults to the dynamo exporter (needs onnxscript,
+        # ignores dynamic_axes); keep the TorchScript one where selectable
+        legacy = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            legacy["dynamo"] = False
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = model_path + ".tmp"
+
+        with torch.no_grad():
+            torch.onnx.export(
+                _Transformer(st[0].auto_model).eval(),
+                args,
+                tmp_path,
+                input_names=list(INPUT_NAMES),
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    **{name: {0: "batch", 1: "seq"} for name in INPUT_NAMES},
+                    "last_hidden_state": {0: "batch", 1: "seq"},
+                },
+                opset_version=14,
+                do_constant_folding=True,
+                **legacy,
+            )
+
+        st.tokenizer.save_pretrained(self.directory)
+
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "model_name": model_name,
+                "max_seq_length": st.max_seq_length,
+                "dim": st.get_sentence_embedding_dimension(),
+                # all-MiniLM-L6-v2 ends in a Normalize module
+                "normalize": any(
+                    type(m).__name__ == "Normalize" for m in st
+                ),
+            }, f)
+
+        os.replace(tmp_path, model_path)
+        print(f"[EMBEDDER] exported {model_name} → {model_path}")
+
+    # -------------------------------------------------
+    def _quantize(self, model_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quant_path = os.path.join(self.directory, "model.int8.onnx")
+
+        if not os.path.exists(quant_path):
+            tmp_path = quant_path + ".tmp"
+            quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, quant_path)
+
+        return quant_path
+
+    # =================================================
+    # ENCODE — SentenceTransformer-compatible
+    # =================================================
+    def encode(
+        self,
+        sentences,
+        batch_size=32,
+        normalize_embeddings=False,
+        convert_to_tensor=False,
+        show_progress_bar=False,
+        **kwargs,
+    ):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        out = np.zeros((len(sentences), self._dim), dtype=np.float32)
+
+        for start in range(0, len(sentences), batch_size):
+            enc = self.tokenizer(
+                sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+
+            ids = enc["input_ids"].astype(np.int64)
+            mask = enc["attention_mask"].astype(np.int64)
+            feeds = {
+                "input_ids": ids,
+                "attention_mask": mask,
+                "token_type_ids": enc.get(
+                    "token_type_ids", np.zeros_like(ids)
+                ).astype(np.int64),
+            }
+
+            hidden = self.session.run(
+                None, {k: v for k, v in feeds.items() if k in self._inputs}
+            )[0]
+
+            # mean pooling over real tokens
+            weights = mask[..., None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1)
+            pooled /= np.maximum(weights.sum(axis=1), 1e-9)
+
+            out[start:start + len(pooled)] = pooled
+
+        if normalize_embeddings or self.normalize:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+
+        if convert_to_tensor:
+            import torch
+            out = torch.from_numpy(out)
+
+        return out[0] if single else out
+
+    # -------------------------------------------------
+    def get_sentence_embedding_dimension(self):
+        return self._dim
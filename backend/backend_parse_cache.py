@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import tempfile
+
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", ".parse_cache")
+PARSE_CACHE_MAX_MB = float(os.getenv("PARSE_CACHE_MAX_MB", "256"))
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent, content-addressed cache of parsed resumes.
+
+    - One JSON file per (PDF SHA-256, parser version)
+    - Hits refresh the file mtime → LRU order
+    - Oldest entries are evicted once the folder exceeds the size cap
+    """
+
+    def __init__(self, cache_dir=PARSE_CACHE_DIR, max_mb=PARSE_CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # -------------------------------------------------
+    def _path(self, digest, version):
+        return os.path.join(self.cache_dir, f"{digest}_{version}.json")
+
+    # =================================================
+    # LOOKUP
+    # =================================================
+    def get(self, digest, version):
+        path = self._path(digest, version)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # touch → most recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return record
+
+    # =================================================
+    # STORE
+    # =================================================
+    def put(self, digest, version, record):
+        path = self._path(digest, version)
+
+        try:
+            # atomic write — safe with several parser processes
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[PARSE CACHE] Write failed for {digest[:12]}: {e}")
+            return
+
+        self._evict()
+
+    # =================================================
+    # LRU EVICTION
+    # =================================================
+    def _evict(self):
+        entries = []
+        total = 0
+
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
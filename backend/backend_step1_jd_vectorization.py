@@ -1,6 +1,8 @@
 from sentence_transformers import SentenceTransformer, util
 import re
 
+from backend_embedding_service import EMBED_MODEL_NAME, get_embedder
+
 
 class JobDescription:
     """
@@ -12,13 +14,16 @@ class JobDescription:
     def __init__(
         self,
         jd_text: str,
-        model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+        model_name: str = EMBED_MODEL_NAME
     ):
         if not jd_text or not jd_text.strip():
             raise ValueError("Job Description text cannot be empty")
 
         self.jd_text = jd_text.strip()
-        self.model = SentenceTransformer(model_name)
+        self.model = (
+            get_embedder() if model_name == EMBED_MODEL_NAME
+            else SentenceTransformer(model_name)
+        )
 
         # Semantic embedding
         self.jd_embedding = self.model.encode(
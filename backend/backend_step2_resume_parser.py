@@ -1,16 +1,26 @@
 import os
 import re
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import fitz  # PyMuPDF
 import pytesseract
-import requests
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from dotenv import load_dotenv
 
+from backend_groq_client import GROQ_API_KEY, get_groq_client
+from backend_parse_cache import file_sha256
+
 load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(os.cpu_count() or 1)))
+PARSER_PARALLEL_MIN_FILES = int(os.getenv("PARSER_PARALLEL_MIN_FILES", "4"))
+# workers start from a clean process — forking the threaded API
+# process can deadlock the child on inherited locks
+PARSER_START_METHOD = os.getenv(
+    "PARSER_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
 
 
 class ResumeParser:
@@ -90,6 +100,9 @@ class ResumeParser:
         "personal projects",
     ]
 
+    # bump whenever extraction logic changes → invalidates the parse cache
+    PARSER_VERSION = "2"
+
     EDUCATION_HEADINGS = [
         "education",
         "academic background",
@@ -98,39 +111,33 @@ class ResumeParser:
     ]
 
     # -------------------------------------------------
-    def __init__(self, resume_folder):
+    def __init__(self, resume_folder, cache=None, workers=PARSER_WORKERS):
         self.resume_folder = resume_folder
+        self.cache = cache
+        self.workers = max(1, int(workers))
 
     # =================================================
     # 🔥 HYBRID TEXT EXTRACTION
     # =================================================
     def _extract_text(self, pdf_path):
-        text = ""
+        pages = []
 
         # ---------- FAST PATH ----------
         try:
-            doc = fitz.open(pdf_path)
-            for page in doc:
-                text += page.get_text()
+            with fitz.open(pdf_path) as doc:
+                for page in doc:
+                    pages.append(page.get_text())
         except Exception as e:
             print(f"[PDF ERROR] {pdf_path}: {e}")
 
+        text = "".join(pages)
+
         # ---------- OCR FALLBACK ----------
         if len(text.strip()) < 50:
             print(f"[OCR] Triggered for {os.path.basename(pdf_path)}")
 
             try:
-                images = convert_from_path(pdf_path, dpi=300)
-                ocr_text = ""
-
-                for img in images:
-                    raw = pytesseract.image_to_string(img)
-
-                    # basic OCR cleanup
-                    raw = re.sub(r"[ \t]+", " ", raw)
-                    raw = re.sub(r"\n{3,}", "\n\n", raw)
-
-                    ocr_text += raw
+                ocr_text = "".join(self._ocr_pages(pdf_path, pages))
 
                 if len(ocr_text.strip()) > len(text.strip()):
                     text = ocr_text
@@ -140,6 +147,47 @@ class ResumeParser:
 
         return text
 
+    # =================================================
+    # 🔥 STREAMING PER-PAGE OCR
+    # =================================================
+    def _ocr_pages(self, pdf_path, pages):
+        """
+        Rasterize and OCR one page at a time — only pages whose own
+        text layer is empty. Peak memory is a single 300-dpi image.
+        """
+        if not pages:
+            page_count = pdfinfo_from_path(pdf_path)["Pages"]
+            pages = [""] * page_count
+
+        result = []
+
+        for number, page_text in enumerate(pages, start=1):
+            if page_text.strip():
+                result.append(page_text)
+                continue
+
+            try:
+                images = convert_from_path(
+                    pdf_path,
+                    dpi=300,
+                    first_page=number,
+                    last_page=number,
+                )
+                raw = pytesseract.image_to_string(images[0]) if images else ""
+                del images
+            except Exception as e:
+                print(f"[OCR ERROR] {pdf_path} page {number}: {e}")
+                result.append(page_text)
+                continue
+
+            # basic OCR cleanup
+            raw = re.sub(r"[ \t]+", " ", raw)
+            raw = re.sub(r"\n{3,}", "\n\n", raw)
+
+            result.append(raw)
+
+        return result
+
     # -------------------------------------------------
     def _extract_email(self, text):
         match = re.search(
@@ -195,16 +243,85 @@ class ResumeParser:
 
         return max(values) if values else 0
 
+    # =================================================
+    # 🔥 SINGLE-PASS SKILL MATCHER
+    # =================================================
+    @staticmethod
+    def _trie_regex(words):
+        """
+        Factor literal words into a prefix-trie regex, so each start
+        position is dispatched on its next character instead of trying
+        every alternative in turn. Longer words win (greedy optional
+        groups) and backtrack to shorter ones if the boundary fails.
+        """
+        trie = {}
+        for w in words:
+            node = trie
+            for ch in w:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        def build(node):
+            alts = [
+                re.escape(ch) + build(child)
+                for ch, child in sorted(node.items())
+                if ch
+            ]
+            if not alts:
+                return ""
+            if "" in node:
+                return "(?:" + "|".join(alts) + ")?"
+            if len(alts) == 1:
+                return alts[0]
+            return "(?:" + "|".join(alts) + ")"
+
+        return build(trie)
+
+    @classmethod
+    def _skill_matcher(cls):
+        """
+        Compile SKILL_MAP once into a single multi-pattern regex.
+
+        The pattern is a zero-width lookahead, so every start position
+        is tried (overlapping hits such as "js" inside "next.js" are
+        kept). Shorter variants that also match at the same position
+        are folded into `implied`, which makes the result identical to
+        one word-bounded search per variant.
+        """
+        if cls.__dict__.get("_skill_matcher_cache") is not None:
+            return cls._skill_matcher_cache
+
+        canonical_of = {}
+        for canonical, variants in cls.SKILL_MAP.items():
+            for v in variants:
+                canonical_of.setdefault(v.lower(), set()).add(canonical)
+
+        implied = {}
+        for v in canonical_of:
+            hits = set(canonical_of[v])
+            for shorter in canonical_of:
+                if (
+                    len(shorter) < len(v)
+                    and v.startswith(shorter)
+                    and re.match(rf"{re.escape(shorter)}\b", v)
+                ):
+                    hits |= canonical_of[shorter]
+            implied[v] = hits
+
+        pattern = re.compile(
+            r"(?=\b(" + cls._trie_regex(canonical_of) + r")\b)"
+        )
+
+        cls._skill_matcher_cache = (pattern, implied)
+        return cls._skill_matcher_cache
+
     # -------------------------------------------------
     def _extract_skills(self, text):
-        text_lower = text.lower()
+        pattern, implied = self._skill_matcher()
         found = set()
 
-        for canonical, variants in self.SKILL_MAP.items():
-            for v in variants:
-                if re.search(rf"\b{re.escape(v.lower())}\b", text_lower):
-                    found.add(canonical)
-                    break
+        for m in pattern.finditer(text.lower()):
+            found |= implied[m.group(1)]
 
         return sorted(found)
 
@@ -217,14 +334,9 @@ class ResumeParser:
         return False
 
     # =================================================
-    # 🔥 LLM STRUCTURED FALLBACK
+    # 🔥 LLM STRUCTURED FALLBACK (BATCHED)
     # =================================================
-    def _llm_structured_parse(self, raw_text, filename):
-        if not GROQ_API_KEY:
-            print("[LLM FALLBACK] GROQ key missing — skipping")
-            return None
-
-        system_prompt = """
+    LLM_SYSTEM_PROMPT = """
 You are an expert resume parser.
 
 Extract structured information from the resume text.
@@ -242,101 +354,235 @@ degree_level: string
 Return ONLY JSON.
 """
 
-        try:
-            res = requests.post(
-                f"{GROQ_BASE_URL}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {GROQ_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "llama-3.3-70b-versatile",
-                    "temperature": 0.1,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": raw_text[:12000]},
-                    ],
-                },
-                timeout=25,
-            )
-
-            res.raise_for_status()
-            content = res.json()["choices"][0]["message"]["content"].strip()
-
-            # remove markdown fences
-            if content.startswith("```"):
-                parts = content.split("```")
-                if len(parts) >= 2:
-                    content = parts[1].strip()
-                if content.lower().startswith("json"):
-                    content = content[4:].strip()
-
-            parsed = json.loads(content)
-
-            print(f"[LLM FALLBACK] Success for {filename}")
-            return parsed
+    def _llm_structured_parse_many(self, items):
+        """
+        items: list of (raw_text, filename).
+        All requests go out concurrently through the shared Groq client,
+        so a batch takes about as long as its slowest call.
+        """
+        if not GROQ_API_KEY:
+            print("[LLM FALLBACK] GROQ key missing — skipping")
+            return [None] * len(items)
+
+        payloads = [
+            {
+                "model": "llama-3.3-70b-versatile",
+                "temperature": 0.1,
+                "messages": [
+                    {"role": "system", "content": self.LLM_SYSTEM_PROMPT},
+                    {"role": "user", "content": raw_text[:12000]},
+                ],
+            }
+            for raw_text, _ in items
+        ]
+
+        responses = get_groq_client().chat_many(payloads)
+        results = []
+
+        for (_, filename), content in zip(items, responses):
+            try:
+                if isinstance(content, Exception):
+                    raise content
+
+                content = content.strip()
+
+                # remove markdown fences
+                if content.startswith("```"):
+                    parts = content.split("```")
+                    if len(parts) >= 2:
+                        content = parts[1].strip()
+                    if content.lower().startswith("json"):
+                        content = content[4:].strip()
+
+                results.append(json.loads(content))
+                print(f"[LLM FALLBACK] Success for {filename}")
+
+            except Exception as e:
+                print(f"[LLM FALLBACK ERROR] {filename}: {e}")
+                results.append(None)
 
+        return results
+
+    # -------------------------------------------------
+    def _apply_llm_fallback(self, results, digests):
+        weak = [r for r in results if r.pop("_weak", False)]
+        if not weak:
+            return
+
+        print(f"[LLM FALLBACK] {len(weak)} weak resumes → batched LLM parse")
+
+        llm_results = self._llm_structured_parse_many(
+            [(r["text"], r["source_file"]) for r in weak]
+        )
+
+        for r, llm_data in zip(weak, llm_results):
+            # failed ones stay uncached so they get retried next time
+            if not llm_data:
+                continue
+
+            r.update({
+                "name": llm_data.get("name", r["name"]),
+                "email": llm_data.get("email", r["email"]),
+                "experience_years": llm_data.get("experience_years", r["experience_years"]),
+                "skills": llm_data.get("skills", r["skills"]),
+                "projects_text": llm_data.get("projects_text", ""),
+                "education_text": llm_data.get("education_text", ""),
+                "degree_level": llm_data.get("degree_level", "unknown"),
+            })
+
+            if self.cache is not None:
+                file = r["source_file"]
+                digest = digests.get(file) or file_sha256(
+                    os.path.join(self.resume_folder, file)
+                )
+                record = {k: v for k, v in r.items() if k != "source_file"}
+                self.cache.put(digest, self.PARSER_VERSION, record)
+
+    # =================================================
+    # SINGLE FILE PARSER
+    # =================================================
+    def parse_file(self, file, digest=None):
+        """
+        Extraction + deterministic parsing for one PDF. Weak resumes
+        come back flagged with "_weak" for the batched LLM fallback in
+        parse_resumes().
+        """
+        path = os.path.join(self.resume_folder, file)
+
+        # ---------- PERSISTENT CACHE ----------
+        if self.cache is not None:
+            if digest is None:
+                digest = file_sha256(path)
+
+            cached = self.cache.get(digest, self.PARSER_VERSION)
+            if cached is not None:
+                print(f"[PARSE CACHE] Hit: {file}")
+                return cached
+
+        record = self._parse_uncached(file, path)
+
+        if self.cache is not None and record is not None and not record.get("_weak"):
+            self.cache.put(digest, self.PARSER_VERSION, record)
+
+        return record
+
+    # -------------------------------------------------
+    def _parse_uncached(self, file, path):
+        text = self._extract_text(path)
+
+        if not text.strip():
+            print(f"[WARNING] No text extracted: {file}")
+            return None
+
+        email = self._extract_email(text)
+        name = self._extract_name(file, text)
+        experience = self._extract_experience(text)
+        skills = self._extract_skills(text)
+
+        record = {
+            "name": name,
+            "email": email,
+            "experience_years": experience,
+            "skills": skills,
+            "text": text,
+            "projects_text": "",
+            "education_text": "",
+            "degree_level": "unknown",
+        }
+
+        # =================================================
+        # 🔥 ELITE LLM FALLBACK — deferred to the batch
+        # =================================================
+        if self._is_weak_resume(text, skills, experience):
+            print(f"[WEAK RESUME DETECTED] {file} → queued for LLM fallback")
+            record["_weak"] = True
+
+        return record
+
+    # -------------------------------------------------
+    def list_resume_files(self):
+        return [
+            f for f in os.listdir(self.resume_folder)
+            if f.lower().endswith(".pdf")
+        ]
+
+    # -------------------------------------------------
+    def _safe_parse_file(self, file, digest=None):
+        # per-file isolation — one broken PDF never fails the batch
+        try:
+            return self.parse_file(file, digest)
         except Exception as e:
-            print(f"[LLM FALLBACK ERROR] {filename}: {e}")
+            print(f"[PARSER ERROR] {file}: {e}")
             return None
 
     # =================================================
-    # MAIN PARSER
+    # 🔥 PARALLEL EXTRACTION (PROCESS POOL)
     # =================================================
-    def parse_resumes(self):
-        results = []
+    def _parse_parallel(self, files, digests, workers, on_file=None):
+        parsed = {}
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(PARSER_START_METHOD),
+        ) as pool:
+            futures = {
+                pool.submit(self._safe_parse_file, file, digests.get(file)): file
+                for file in files
+            }
+
+            # completion order for progress, input order for results
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    parsed[file] = future.result()
+                except Exception as e:
+                    print(f"[PARSER ERROR] {file}: {e}")
+                    parsed[file] = None
 
-        for file in os.listdir(self.resume_folder):
-            if not file.lower().endswith(".pdf"):
-                continue
+                if on_file:
+                    on_file(file, parsed[file] is not None)
 
-            path = os.path.join(self.resume_folder, file)
-            text = self._extract_text(path)
+        return [parsed[file] for file in files]
 
-            if not text.strip():
-                print(f"[WARNING] No text extracted: {file}")
-                continue
+    # =================================================
+    # MAIN PARSER
+    # =================================================
+    def parse_resumes(self, files=None, digests=None, workers=None, on_file=None):
+        """
+        Parse the given PDF filenames (default: the whole folder).
+        Results keep the order of `files`; unreadable files are skipped.
+        `digests` optionally maps filename → precomputed SHA-256.
+        `on_file(file, ok)` is called as each file finishes.
+
+        Batches of PARSER_PARALLEL_MIN_FILES or more are spread over a
+        process pool; the output is identical to the serial path.
+        """
+        if files is None:
+            files = self.list_resume_files()
+
+        digests = digests or {}
+        workers = min(workers or self.workers, len(files))
+
+        if workers > 1 and len(files) >= PARSER_PARALLEL_MIN_FILES:
+            print(f"[PARSER] Parallel extraction — {workers} workers")
+            parsed_list = self._parse_parallel(files, digests, workers, on_file)
+        else:
+            parsed_list = []
+            for file in files:
+                parsed = self._safe_parse_file(file, digests.get(file))
+                parsed_list.append(parsed)
+
+                if on_file:
+                    on_file(file, parsed is not None)
 
-            email = self._extract_email(text)
-            name = self._extract_name(file, text)
-            experience = self._extract_experience(text)
-            skills = self._extract_skills(text)
-
-            # =================================================
-            # 🔥 ELITE LLM FALLBACK
-            # =================================================
-            if self._is_weak_resume(text, skills, experience):
-                print(f"[WEAK RESUME DETECTED] {file} → using LLM fallback")
-
-                llm_data = self._llm_structured_parse(text, file)
-
-                if llm_data:
-                    results.append({
-                        "name": llm_data.get("name", name),
-                        "email": llm_data.get("email", email),
-                        "experience_years": llm_data.get("experience_years", experience),
-                        "skills": llm_data.get("skills", skills),
-                        "text": text,
-                        "projects_text": llm_data.get("projects_text", ""),
-                        "education_text": llm_data.get("education_text", ""),
-                        "degree_level": llm_data.get("degree_level", "unknown"),
-                    })
-                    continue
+        results = []
 
-            # ---------- normal deterministic path ----------
-            projects_text = ""
-            education_text = ""
-
-            results.append({
-                "name": name,
-                "email": email,
-                "experience_years": experience,
-                "skills": skills,
-                "text": text,
-                "projects_text": projects_text,
-                "education_text": education_text,
-                "degree_level": "unknown",
-            })
+        for file, parsed in zip(files, parsed_list):
+            if parsed is not None:
+                parsed["source_file"] = file
+                results.append(parsed)
+
+        self._apply_llm_fallback(results, digests)
 
         print(f"[PARSER] Parsed resumes: {len(results)}")
-        return results
\ No newline at end of file
+        return results
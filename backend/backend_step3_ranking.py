@@ -1,5 +1,72 @@
+import os
 import re
-from sentence_transformers import util
+import json
+import bisect
+import hashlib
+import itertools
+import numpy as np
+
+from backend_embedding_codec import decode_vectors
+
+# how per-chunk similarities collapse to one resume score: max | mean
+CHUNK_POOLING = os.getenv("CHUNK_POOLING", "max")
+
+
+class ResumeFeatures:
+    """
+    Ranking features of one resume, computed once at ingest.
+
+    Every ranking component reads from here instead of re-lowercasing
+    and re-scanning the full text on each ranking call.
+    """
+
+    __slots__ = (
+        "text_lower",
+        "token_count",
+        "tool_counts",
+        "title_counts",
+        "skills",
+        "_term_hits",
+    )
+
+    @classmethod
+    def build(cls, text, skills, role_tools, title_hints):
+        f = cls()
+        f.text_lower = text.lower()
+        f.token_count = len(f.text_lower.split())
+
+        # capped tool mentions per role
+        f.tool_counts = {
+            role: sum(min(f.text_lower.count(t), 3) for t in tools)
+            for role, tools in role_tools.items()
+        }
+
+        # role hints in the first lines (the title block)
+        head = " ".join(f.text_lower.split("\n")[:5])
+        f.title_counts = {
+            role: sum(head.count(h) for h in hints)
+            for role, hints in title_hints.items()
+        }
+
+        f.skills = frozenset(s.lower() for s in skills)
+        f._term_hits = {}
+        return f
+
+    # -------------------------------------------------
+    def has_skill(self, skill):
+        """
+        Parsed skill or word-bounded mention; text scans are memoized
+        per term, so each JD skill is searched at most once.
+        """
+        if skill in self.skills:
+            return True
+
+        hit = self._term_hits.get(skill)
+        if hit is None:
+            hit = bool(re.search(rf"\b{re.escape(skill)}\b", self.text_lower))
+            self._term_hits[skill] = hit
+
+        return hit
 
 
 class ResumeRanker:
@@ -18,6 +85,12 @@ class ResumeRanker:
     W_RESP = 0.03
     W_KEYWORD = 0.0
 
+    # per-resume component vector, in column order
+    COMPONENTS = (
+        "role", "semantic", "skill", "gate",
+        "experience", "project", "responsibility", "cluster",
+    )
+
     ROLE_TOOL_SIGNALS = {
         "devops": [
             "docker", "kubernetes", "terraform", "jenkins",
@@ -65,15 +138,16 @@ class ResumeRanker:
     # =================================================
     # INIT
     # =================================================
-    def __init__(self, embedder, jd_text, jd_schema):
+    def __init__(self, embedder, jd_text, jd_schema, pooling=CHUNK_POOLING):
+        if pooling not in ("max", "mean"):
+            raise ValueError(f"Unknown chunk pooling: {pooling}")
+
         self.embedder = embedder
+        self.pooling = pooling
         self.jd_text = jd_text.lower()
         self.jd_schema = jd_schema
 
-        self.jd_embedding = embedder.encode(
-            [jd_text],
-            normalize_embeddings=True
-        )
+        self.jd_embedding = embedder.embed([jd_text])
 
         self.core_skills = set(
             s.lower() for s in jd_schema.get("core_skills", [])
@@ -92,7 +166,7 @@ class ResumeRanker:
         ).strip()
 
         self.resp_embedding = (
-            embedder.encode([self.resp_text], normalize_embeddings=True)
+            embedder.embed([self.resp_text])
             if self.resp_text else None
         )
 
@@ -114,15 +188,30 @@ class ResumeRanker:
         return 0.0, 0.0
 
     # =================================================
-    # ROLE INFERENCE
+    # PRECOMPUTED FEATURES
     # =================================================
-    def _extract_title_signal(self, text):
-        lines = text.lower().split("\n")[:5]
-        joined = " ".join(lines)
+    @classmethod
+    def build_features(cls, resume):
+        return ResumeFeatures.build(
+            resume.get("text", ""),
+            resume.get("skills", []),
+            cls.ROLE_TOOL_SIGNALS,
+            cls.TITLE_ROLE_HINTS,
+        )
 
-        scores = {}
-        for role, hints in self.TITLE_ROLE_HINTS.items():
-            scores[role] = sum(joined.count(h) for h in hints)
+    def _features(self, resume):
+        # built once at ingest; lazily for resumes that skipped it
+        features = resume.get("features")
+        if features is None:
+            features = self.build_features(resume)
+            resume["features"] = features
+        return features
+
+    # =================================================
+    # ROLE INFERENCE
+    # =================================================
+    def _extract_title_signal(self, features):
+        scores = features.title_counts
 
         best_role = max(scores, key=scores.get)
         conf = scores[best_role]
@@ -132,17 +221,13 @@ class ResumeRanker:
 
         return best_role, min(conf / 2.0, 1.0)
 
-    def _extract_tool_signal(self, text):
-        text_lower = text.lower()
-        length_norm = len(text_lower.split()) + 1
+    def _extract_tool_signal(self, features):
+        length_norm = features.token_count + 1
 
-        scores = {}
-
-        for role, tools in self.ROLE_TOOL_SIGNALS.items():
-            raw = 0
-            for t in tools:
-                raw += min(text_lower.count(t), 3)
-            scores[role] = raw / length_norm
+        scores = {
+            role: raw / length_norm
+            for role, raw in features.tool_counts.items()
+        }
 
         best_role = max(scores, key=scores.get)
         conf = scores[best_role]
@@ -152,9 +237,15 @@ class ResumeRanker:
 
         return best_role, min(conf * 5, 1.0)
 
-    def _infer_role_with_confidence(self, text):
-        title_role, title_conf = self._extract_title_signal(text)
-        tool_role, tool_conf = self._extract_tool_signal(text)
+    def _infer_role_with_confidence(self, text_or_features):
+        features = text_or_features
+        if isinstance(features, str):
+            features = ResumeFeatures.build(
+                features, [], self.ROLE_TOOL_SIGNALS, self.TITLE_ROLE_HINTS
+            )
+
+        title_role, title_conf = self._extract_title_signal(features)
+        tool_role, tool_conf = self._extract_tool_signal(features)
 
         role_scores = {}
 
@@ -178,8 +269,9 @@ class ResumeRanker:
     # ROLE ALIGNMENT
     # =================================================
     def role_alignment_score(self, resume):
-        text = resume.get("text", "").lower()
-        candidate_role, conf = self._infer_role_with_confidence(text)
+        candidate_role, conf = self._infer_role_with_confidence(
+            self._features(resume)
+        )
 
         if candidate_role == self.jd_role:
             return 0.92 + 0.08 * conf
@@ -196,8 +288,7 @@ class ResumeRanker:
         if self.jd_role != "devops":
             return 1.0
 
-        skills = set(s.lower() for s in resume.get("skills", []))
-        devops_hits = len(self.DEVOPS_CLUSTER & skills)
+        devops_hits = len(self.DEVOPS_CLUSTER & self._features(resume).skills)
 
         if devops_hits >= 4:
             return 1.08
@@ -236,16 +327,12 @@ class ResumeRanker:
     # SKILL COVERAGE
     # =================================================
     def skill_score(self, resume):
-        res_skills = set(s.lower() for s in resume.get("skills", []))
-        text_lower = resume.get("text", "").lower()
+        features = self._features(resume)
 
         if not self.core_skills:
             return 1.0, 1.0
 
-        matches = 0
-        for skill in self.core_skills:
-            if skill in res_skills or re.search(rf"\b{re.escape(skill)}\b", text_lower):
-                matches += 1
+        matches = sum(features.has_skill(skill) for skill in self.core_skills)
 
         coverage = matches / len(self.core_skills)
 
@@ -264,11 +351,10 @@ class ResumeRanker:
     # SEMANTIC
     # =================================================
     def semantic_score(self, resume):
-        emb = resume.get("text_embedding")
-        if emb is None:
+        sem = self._pooled_similarity(self.jd_embedding, resume)
+        if sem is None:
             return 0.0
 
-        sem = util.cos_sim(self.jd_embedding, emb)[0][0].item()
         return max(0.15, min(sem, 0.92))
 
     # =================================================
@@ -280,10 +366,16 @@ class ResumeRanker:
         if proj_emb is None:
             return 0.03
 
-        if self.resp_embedding is not None:
-            return util.cos_sim(self.resp_embedding, proj_emb)[0][0].item()
+        reference = (
+            self.resp_embedding if self.resp_embedding is not None
+            else self.jd_embedding
+        )
+
+        # stored vector may be float16 / int8 → decode before comparing
+        ref = self._unit_rows(np.asarray(reference, dtype=np.float32).reshape(1, -1))
+        proj = self._unit_rows(decode_vectors(proj_emb).reshape(1, -1))
 
-        return util.cos_sim(self.jd_embedding, proj_emb)[0][0].item()
+        return float(proj[0] @ ref[0])
 
     # =================================================
     # RESPONSIBILITY
@@ -292,45 +384,404 @@ class ResumeRanker:
         if self.resp_embedding is None:
             return 0.35
 
-        emb = resume.get("text_embedding")
-        if emb is None:
-            return 0.35
+        sim = self._pooled_similarity(self.resp_embedding, resume)
+        return 0.35 if sim is None else sim
+
+    # -------------------------------------------------
+    def _pooled_similarity(self, reference, resume):
+        ref = self._unit_rows(np.asarray(reference, dtype=np.float32).reshape(1, -1))
+
+        chunks, starts, present = self._stack_chunks([resume], ref.shape[1])
+        if not present[0]:
+            return None
 
-        return util.cos_sim(self.resp_embedding, emb)[0][0].item()
+        return float(self._pool(chunks @ ref[0], starts, present, self.pooling)[0])
 
     # =================================================
     # FINAL — BROADER SPECTRUM
     # =================================================
     def score_resume(self, resume):
-        try:
-            role = self.role_alignment_score(resume)
-            sem = self.semantic_score(resume)
-            skill, gate = self.skill_score(resume)
-            exp = self.experience_score(resume)
-            proj = self.project_score(resume)
-            resp = self.responsibility_score(resume)
-
-            weighted = (
-                self.W_ROLE * role +
-                self.W_SKILL * skill +
-                self.W_EXP * exp +
-                self.W_SEMANTIC_MAIN * sem +
-                self.W_PROJECT * proj +
-                self.W_RESP * resp
+        # single-row score_batch → always identical to the batch path
+        return self.score_batch([resume])[0]
+
+    # =================================================
+    # 🔥 VECTORIZED BATCH SCORING
+    # =================================================
+    @staticmethod
+    def _unit_rows(vectors):
+        # same normalization as util.cos_sim (L2, eps 1e-12)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @classmethod
+    def _stack_embeddings(cls, resumes, key, dim):
+        """
+        Stack one embedding field → unit-norm (N, dim) float32 matrix
+        plus a presence mask. Missing vectors become zero rows.
+        """
+        matrix = np.zeros((len(resumes), dim), dtype=np.float32)
+        present = np.zeros(len(resumes), dtype=bool)
+
+        for i, r in enumerate(resumes):
+            emb = r.get(key)
+            if emb is not None:
+                matrix[i] = decode_vectors(emb).reshape(-1)
+                present[i] = True
+
+        return cls._unit_rows(matrix), present
+
+    @classmethod
+    def _stack_chunks(cls, resumes, dim):
+        """
+        Concatenate every resume's chunk matrix → unit-norm (C, dim)
+        matrix, per-resume start rows and a presence mask. Resumes
+        without chunks fall back to their single text_embedding.
+        """
+        blocks = []
+        starts = np.zeros(len(resumes), dtype=np.intp)
+        present = np.zeros(len(resumes), dtype=bool)
+        row = 0
+
+        for i, r in enumerate(resumes):
+            block = r.get("chunk_embeddings")
+            if block is None or len(block) == 0:
+                block = r.get("text_embedding")
+
+            starts[i] = row
+            if block is None:
+                continue
+
+            # stored precision (float16 / int8) → float32 here
+            block = decode_vectors(block)
+            block = block.reshape(-1, block.shape[-1])
+            blocks.append(block)
+            present[i] = True
+            row += block.shape[0]
+
+        if not blocks:
+            return np.zeros((0, dim), dtype=np.float32), starts, present
+
+        return cls._unit_rows(np.concatenate(blocks)), starts, present
+
+    @staticmethod
+    def _pool(sims, starts, present, pooling):
+        """
+        Per-chunk similarities (C,) or (C, J) → one row per resume
+        (max or mean over its chunks); absent resumes get 0.
+        """
+        out = np.zeros((len(starts),) + sims.shape[1:], dtype=np.float64)
+        if not present.any():
+            return out
+
+        sims = sims.astype(np.float64)
+        # absent resumes own no rows, so present starts delimit segments
+        seg_starts = starts[present]
+
+        if pooling == "mean":
+            counts = np.diff(np.append(seg_starts, len(sims)))
+            out[present] = (
+                np.add.reduceat(sims, seg_starts, axis=0)
+                / counts.reshape((-1,) + (1,) * (sims.ndim - 1))
+            )
+        else:
+            out[present] = np.maximum.reduceat(sims, seg_starts, axis=0)
+
+        return out
+
+    @classmethod
+    def _pool_columns(cls, sims, starts, present, rankers):
+        # (C, J) → (N, J), each JD column pooled the way its ranker asks
+        out = np.zeros((len(starts), sims.shape[1]), dtype=np.float64)
+
+        for pooling in {r.pooling for r in rankers}:
+            cols = [j for j, r in enumerate(rankers) if r.pooling == pooling]
+            out[:, cols] = cls._pool(sims[:, cols], starts, present, pooling)
+
+        return out
+
+    # -------------------------------------------------
+    def _text_components(self, resume):
+        # per-resume, non-embedding components
+        role = self.role_alignment_score(resume)
+        skill, gate = self.skill_score(resume)
+        exp = self.experience_score(resume)
+        cluster = self._cluster_bonus(resume)
+        return role, skill, gate, exp, cluster
+
+    def score_batch(self, resumes, components=False):
+        """
+        Score many resumes at once → list of floats (same order).
+
+        All similarity components come from a few matrix products over
+        the stacked embeddings; the calibration math runs on arrays.
+        With `components`, returns (scores, (N, len(COMPONENTS)) array).
+        """
+        return self.score_matrix([self], resumes, components)[0]
+
+    @classmethod
+    def score_matrix(cls, rankers, resumes, components=False):
+        """
+        Score one resume pool against several JDs → one list of scores
+        per ranker (a JD × resume matrix), or one (scores, components)
+        pair per ranker.
+
+        Chunk and project matrices are stacked once; each similarity
+        component is a single product against all JD vectors at once.
+        """
+        n = len(resumes)
+        if n == 0 or not rankers:
+            empty = np.zeros((0, len(cls.COMPONENTS)), dtype=np.float32)
+            return [([], empty) if components else [] for _ in rankers]
+
+        jd = cls._unit_rows(np.stack([
+            np.asarray(r.jd_embedding, dtype=np.float32).reshape(-1)
+            for r in rankers
+        ]))
+        dim = jd.shape[1]
+
+        chunk_mat, chunk_starts, has_text = cls._stack_chunks(resumes, dim)
+        proj_mat, has_proj = cls._stack_embeddings(resumes, "project_embedding", dim)
+
+        has_resp = np.array([r.resp_embedding is not None for r in rankers])
+        resp = cls._unit_rows(np.stack([
+            np.asarray(r.resp_embedding, dtype=np.float32).reshape(-1)
+            if r.resp_embedding is not None else np.zeros(dim, dtype=np.float32)
+            for r in rankers
+        ]))
+
+        # ---------- similarity components ----------
+        # 🔥 one product over every chunk of every resume, then pooled
+        sem_raw = cls._pool_columns(chunk_mat @ jd.T, chunk_starts, has_text, rankers)
+        resp_raw = cls._pool_columns(chunk_mat @ resp.T, chunk_starts, has_text, rankers)
+
+        # projects compare against responsibilities, else the JD itself
+        proj_ref = np.where(has_resp[:, None], resp, jd)
+        proj_raw = (proj_mat @ proj_ref.T).astype(np.float64)
+
+        return [
+            ranker._calibrate(
+                resumes,
+                sem_raw[:, j],
+                resp_raw[:, j] if has_resp[j] else None,
+                proj_raw[:, j],
+                has_text,
+                has_proj,
+                components,
             )
+            for j, ranker in enumerate(rankers)
+        ]
+
+    def _calibrate(
+        self, resumes, sem_raw, resp_raw, proj_raw, has_text, has_proj,
+        components=False,
+    ):
+        # similarity columns for this JD → final calibrated scores
+        n = len(resumes)
+
+        sem = np.where(has_text, np.clip(sem_raw, 0.15, 0.92), 0.0)
+        proj = np.where(has_proj, proj_raw, 0.03)
+
+        if resp_raw is not None:
+            resp_s = np.where(has_text, resp_raw, 0.35)
+        else:
+            resp_s = np.full(n, 0.35)
+
+        # ---------- text components ----------
+        comps = np.zeros((n, 5), dtype=np.float64)
+        failed = np.zeros(n, dtype=bool)
+
+        for i, r in enumerate(resumes):
+            try:
+                comps[i] = self._text_components(r)
+            except Exception as e:
+                print(f"[RANK ERROR] {r.get('name','Unknown')}: {e}")
+                failed[i] = True
+
+        role, skill, gate, exp, cluster = comps.T
+
+        weighted = (
+            self.W_ROLE * role +
+            self.W_SKILL * skill +
+            self.W_EXP * exp +
+            self.W_SEMANTIC_MAIN * sem +
+            self.W_PROJECT * proj +
+            self.W_RESP * resp_s
+        )
 
-            final = weighted * gate
-            final *= self._cluster_bonus(resume)
+        final = weighted * gate
+        final *= cluster
 
-            # 🔥 ATS-calibrated spread widening
-            final = final ** 0.82
-            final = final * 1.55
+        # a negative base has no real power → score 0
+        failed |= final < 0
+        final = np.where(failed, 0.0, final)
 
-            if final < 0.12:
-                final *= 0.75
+        # 🔥 ATS-calibrated spread widening
+        final = final ** 0.82
+        final = final * 1.55
 
-            return round(min(final * 100, 100), 2)
+        final = np.where(final < 0.12, final * 0.75, final)
+        final = np.minimum(final * 100, 100)
+
+        scores = [
+            0.0 if bad else round(float(x), 2)
+            for x, bad in zip(final, failed)
+        ]
+
+        if not components:
+            return scores
+
+        # same column order as COMPONENTS
+        return scores, np.column_stack(
+            [role, sem, skill, gate, exp, proj, resp_s, cluster]
+        ).astype(np.float32)
+
+
+class RankingCache:
+    """
+    Incrementally maintained ranking for one JD.
+
+    - Scores cached per (JD fingerprint, resume content hash)
+    - Entries kept sorted by (-score, arrival) → a new resume costs one
+      score plus an O(log n) bisect insert
+    - `version` bumps only when the ordering changes
+    - Score components (ResumeRanker.COMPONENTS) live in one columnar
+      float32 matrix, a row per scored resume, so explanations and
+      component sorts are lookups rather than re-scoring runs
+    """
+
+    def __init__(self, jd_fingerprint, components=ResumeRanker.COMPONENTS):
+        self.jd_fingerprint = jd_fingerprint
+        self.components = components
+        self.version = 0
+
+        self._scores = {}
+        self._order = []
+        self._entries = {}
+        self._seq = itertools.count()
+
+        # columnar component store — grows by doubling
+        self._matrix = np.zeros((64, len(components)), dtype=np.float32)
+        self._rows = {}
+
+    # -------------------------------------------------
+    @staticmethod
+    def fingerprint(jd_text, jd_schema):
+        payload = jd_text + "\n" + json.dumps(jd_schema, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # =================================================
+    # SYNC WITH THE RESUME POOL
+    # =================================================
+    def sync(self, resumes, ranker):
+        """
+        Bring the sorted ranking in line with `resumes`. Only resumes
+        never scored for this JD are scored. Returns True on change.
+        """
+        current = {r["content_hash"]: r for r in resumes}
+
+        removed = [h for h in self._entries if h not in current]
+        added = [r for h, r in current.items() if h not in self._entries]
+
+        for h in removed:
+            sort_key, _ = self._entries.pop(h)
+            i = bisect.bisect_left(self._order, sort_key)
+            del self._order[i]
+
+        unscored = [
+            r for r in added
+            if (self.jd_fingerprint, r["content_hash"]) not in self._scores
+        ]
+        if unscored:
+            scores, comps = ranker.score_batch(unscored, components=True)
+            self._reserve(len(self._rows) + len(unscored))
+
+            for r, score, comp in zip(unscored, scores, comps):
+                key = (self.jd_fingerprint, r["content_hash"])
+                self._scores[key] = max(0.0, min(score, 100.0))
+
+                self._rows[key] = len(self._rows)
+                self._matrix[self._rows[key]] = comp
+
+        for r in added:
+            score = self._scores[(self.jd_fingerprint, r["content_hash"])]
+            sort_key = (-score, next(self._seq), r["content_hash"])
+            bisect.insort(self._order, sort_key)
+            self._entries[r["content_hash"]] = (sort_key, r)
+
+        changed = bool(removed or added)
+        if changed:
+            self.version += 1
+
+        return changed
+
+    def _reserve(self, n_rows):
+        if n_rows <= len(self._matrix):
+            return
+
+        grown = np.zeros(
+            (max(n_rows, 2 * len(self._matrix)), len(self.components)),
+            dtype=np.float32,
+        )
+        grown[:len(self._matrix)] = self._matrix
+        self._matrix = grown
+
+    # -------------------------------------------------
+    def components_of(self, content_hash):
+        """
+        component name → value for one ranked resume, or None.
+        """
+        row = self._rows.get((self.jd_fingerprint, content_hash))
+        if row is None:
+            return None
+
+        return {
+            name: round(float(v), 4)
+            for name, v in zip(self.components, self._matrix[row])
+        }
+
+    # -------------------------------------------------
+    def ordered(self):
+        """
+        (resume, score) pairs, best first.
+        """
+        return [
+            (self._entries[h][1], -neg_score)
+            for neg_score, _, h in self._order
+        ]
+
+    # -------------------------------------------------
+    def page(self, offset=0, limit=None, min_score=None, sort_by=None):
+        """
+        One slice of the ranking → ([(resume, score)], total), where
+        total counts entries with score >= min_score. The order is
+        already maintained, so this costs O(log n + limit).
+
+        `sort_by` names a component to order by instead of the final
+        score (ties keep score order); that is a column lookup plus
+        one argsort over the matching entries.
+        """
+        if min_score is None:
+            total = len(self._order)
+        else:
+            total = bisect.bisect_right(self._order, (-min_score, float("inf")))
+
+        end = total if limit is None else min(total, offset + limit)
+
+        if sort_by is None or sort_by == "score":
+            selected = self._order[offset:end]
+        else:
+            col = self.components.index(sort_by)
+            matching = self._order[:total]
+
+            rows = np.fromiter(
+                (self._rows[(self.jd_fingerprint, h)] for _, _, h in matching),
+                dtype=np.intp,
+                count=len(matching),
+            )
+            order = np.argsort(-self._matrix[rows, col], kind="stable")
+            selected = [matching[i] for i in order[offset:end]]
 
-        except Exception as e:
-            print(f"[RANK ERROR] {resume.get('name','Unknown')}: {e}")
-            return 0.0
\ No newline at end of file
+        return [
+            (self._entries[h][1], -neg_score)
+            for neg_score, _, h in selected
+        ], total
@@ -1,15 +1,91 @@
 import os
 import re
+import glob
+import json
+import uuid
 import requests
+from collections import OrderedDict
 import faiss
 import numpy as np
 from dotenv import load_dotenv
 
+from backend_chunking import chunk_spans
+from backend_embedding_codec import decode_vectors
+from backend_step3_ranking import ResumeRanker
+
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_BASE_URL = "https://api.groq.com/openai/v1"
 
+RAG_SNAPSHOT_DIR = os.getenv("RAG_SNAPSHOT_DIR", ".rag_snapshot")
+SNAPSHOT_FORMAT = 2
+# seconds an upload burst is coalesced into one snapshot write
+RAG_SNAPSHOT_INTERVAL = float(os.getenv("RAG_SNAPSHOT_INTERVAL", "30"))
+
+# exact flat search up to this many chunks, HNSW beyond (0 → never);
+# flat costs ~0.4 ms/query at 5k chunks, ~4 ms at 20k
+RAG_ANN_THRESHOLD = int(os.getenv("RAG_ANN_THRESHOLD", "5000"))
+RAG_HNSW_M = int(os.getenv("RAG_HNSW_M", "32"))
+RAG_HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "80"))
+# efSearch up to HNSW_EF_REFERENCE_CHUNKS, grown by sqrt(ntotal / that)
+# beyond it so recall@5 holds ~0.97 as the index grows
+RAG_HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "128"))
+RAG_HNSW_EF_MAX = int(os.getenv("RAG_HNSW_EF_MAX", "1024"))
+HNSW_EF_REFERENCE_CHUNKS = 5000
+# HNSW can't delete → removed chunks stay as tombstones until this share
+RAG_TOMBSTONE_RATIO = float(os.getenv("RAG_TOMBSTONE_RATIO", "0.2"))
+
+# query text → embedding, and LLM answers for repeat questions
+RAG_QUERY_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "1024"))
+RAG_ANSWER_CACHE_SIZE = int(os.getenv("RAG_ANSWER_CACHE_SIZE", "256"))
+# opt-in: cosine at which a reworded question reuses a cached answer
+# (e.g. 0.97). Off by default — "top 3" vs "top 5" or two similar names
+# score above that, so only exact (normalized) repeats hit the cache
+RAG_ANSWER_SIMILARITY = float(os.getenv("RAG_ANSWER_SIMILARITY", "0"))
+
+# _call_llm() failures — never cached
+LLM_FAILURES = ("LLM key missing.", "LLM error:")
+
+# resume fields the chatbot answers from — all a snapshot keeps
+SNAPSHOT_RESUME_FIELDS = ("content_hash", "name", "email", "experience_years", "text")
+
+
+# =====================================================
+# ANN INDEX
+# =====================================================
+def build_hnsw_index(
+    vectors,
+    ids,
+    m=RAG_HNSW_M,
+    ef_construction=RAG_HNSW_EF_CONSTRUCTION,
+    ef_search=None,
+):
+    """
+    HNSW (inner product) behind an ID map, same ids as the flat index.
+    efSearch defaults to ann_ef_search() of the index size.
+    """
+    hnsw = faiss.IndexHNSWFlat(vectors.shape[1], m, faiss.METRIC_INNER_PRODUCT)
+    hnsw.hnsw.efConstruction = ef_construction
+
+    index = faiss.IndexIDMap2(hnsw)
+    index.add_with_ids(vectors, ids)
+
+    hnsw.hnsw.efSearch = ef_search or ann_ef_search(index.ntotal)
+    return index
+
+
+def ann_ef_search(ntotal):
+    # wider beam for bigger graphs — fixed ef loses recall as ntotal grows
+    scale = max(1.0, ntotal / HNSW_EF_REFERENCE_CHUNKS) ** 0.5
+    return int(min(RAG_HNSW_EF_MAX, RAG_HNSW_EF_SEARCH * scale))
+
+
+def hnsw_of(index):
+    # the HNSW inside an ID map, or None for a flat index
+    sub = faiss.downcast_index(index.index)
+    return sub if isinstance(sub, faiss.IndexHNSW) else None
+
 
 class ResumeRAGChatbot:
     """
@@ -40,10 +116,27 @@ Do not hallucinate.
     def __init__(self, resumes, jd_schema, embedder):
         self.embedder = embedder
         self.index = None
-        self.chunks = []
+        self.chunks = {}           # chunk id → (candidate id, start, end)
+        self._candidates = {}      # candidate id → name, text
+        self._resume_chunks = {}   # candidate id → chunk ids
+        self._next_id = 0
         self.raw_resumes = resumes or []
         self.jd_summary = self._build_jd_summary(jd_schema)
 
+        # bumped on every add/remove; snapshots record it
+        self.version = 0
+        self._saved_version = None
+        self._mapped = False
+        # candidate ids already in the snapshot's resumes.jsonl
+        self._logged_resumes = set()
+        # (index, chunk count) → search params excluding tombstones
+        self._live_params = None
+
+        # LRU caches: normalized query → vector, and
+        # (query, version, top_k, ranking version) → (vector, answer)
+        self._query_vectors = OrderedDict()
+        self._answers = OrderedDict()
+
         if resumes:
             self._build_index(resumes)
 
@@ -65,31 +158,110 @@ Do not hallucinate.
     # =====================================================
     # RANKING INTELLIGENCE
     # =====================================================
+    # additive score components → (weight, label)
+    COMPONENT_LABELS = {
+        "role": (ResumeRanker.W_ROLE, "role alignment"),
+        "skill": (ResumeRanker.W_SKILL, "skill coverage"),
+        "experience": (ResumeRanker.W_EXP, "experience fit"),
+        "semantic": (ResumeRanker.W_SEMANTIC_MAIN, "semantic similarity"),
+        "project": (ResumeRanker.W_PROJECT, "project relevance"),
+        "responsibility": (ResumeRanker.W_RESP, "responsibility match"),
+    }
+
+    def _explain_rank(self, name, ranking_df):
+        """
+        Explain one candidate's position from the component columns the
+        ranking already carries — no re-scoring.
+        """
+        matches = ranking_df[ranking_df["name"].str.lower() == name]
+        if matches.empty:
+            return None
+
+        pos = ranking_df.index.get_loc(matches.index[0])
+        row = ranking_df.iloc[pos]
+
+        head = (
+            f"{row['name']} is ranked #{pos + 1} with a match score "
+            f"of {row['score']}%."
+        )
+
+        if not set(self.COMPONENT_LABELS) <= set(ranking_df.columns):
+            return head
+
+        lines = [head, "", "Score components:"]
+        for comp, (weight, label) in self.COMPONENT_LABELS.items():
+            lines.append(f"- {label}: {row[comp]:.2f} (weight {weight:.2f})")
+
+        if row.get("gate", 1.0) < 1.0:
+            lines.append(f"- core-skill gate: ×{row['gate']:.2f} (missing core skills)")
+        if row.get("cluster", 1.0) > 1.0:
+            lines.append(f"- skill-cluster bonus: ×{row['cluster']:.2f}")
+
+        # compare against the neighbour it beat, or the one above it
+        other_pos = pos + 1 if pos == 0 else pos - 1
+        if other_pos < len(ranking_df):
+            other = ranking_df.iloc[other_pos]
+
+            diffs = sorted(
+                (
+                    (weight * (row[comp] - other[comp]), label, row[comp], other[comp])
+                    for comp, (weight, label) in self.COMPONENT_LABELS.items()
+                ),
+                reverse=True,
+            )
+
+            ahead = [d for d in diffs if d[0] > 0.005][:2]
+            behind = [d for d in diffs[::-1] if d[0] < -0.005][:2]
+
+            def fmt(items):
+                return " and ".join(
+                    f"{label} ({mine:.2f} vs {theirs:.2f})"
+                    for _, label, mine, theirs in items
+                )
+
+            lines.append("")
+            lines.append(
+                f"Compared with #{other_pos + 1} {other['name']} "
+                f"({other['score']}%):"
+            )
+            if ahead:
+                lines.append(f"- ahead on {fmt(ahead)}")
+            if behind:
+                lines.append(f"- behind on {fmt(behind)}")
+
+        return "\n".join(lines)
+
     def _ranking_answer(self, query: str, ranking_df):
         if ranking_df is None or ranking_df.empty:
             return None
 
         q = query.lower()
 
-        # why is X first
-        m = re.search(r"why is (.+?) first", q)
+        # why is X first / ranked #3 / so low ...
+        m = re.search(
+            r"why is (.+?) (?:ranked |placed )?"
+            r"(?:first|top|last|here|so high|so low|#\d+|\d+(?:st|nd|rd|th))\b",
+            q,
+        )
         if m:
-            name = m.group(1).strip().title()
-
-            row = ranking_df[
-                ranking_df["name"].str.lower() == name.lower()
-            ]
-            if row.empty:
-                return None
+            return self._explain_rank(m.group(1).strip(), ranking_df)
 
-            score = float(row.iloc[0]["score"])
-            rank = int(row.index[0]) + 1
-
-            return (
-                f"{name} is ranked #{rank} with a match score of {score}%. "
-                "The ranking is based on semantic similarity, skill coverage, "
-                "experience alignment, and project relevance to the job description."
+        # rank / sort by a component
+        m = re.search(r"(?:rank|sort)(?:ed)? by (\w+)", q)
+        if m:
+            comp = next(
+                (c for c in self.COMPONENT_LABELS if m.group(1).startswith(c[:5])),
+                None,
             )
+            if comp and comp in ranking_df.columns:
+                top = ranking_df.sort_values(comp, ascending=False, kind="stable")
+                lines = [
+                    f"{i+1}. {row['name']} — {row[comp]:.2f} "
+                    f"(overall {row['score']}%)"
+                    for i, (_, row) in enumerate(top.head(10).iterrows())
+                ]
+                label = self.COMPONENT_LABELS[comp][1]
+                return f"Top candidates by {label}:\n" + "\n".join(lines)
 
         # who is first
         if "who is first" in q or "top candidate" in q:
@@ -179,31 +351,393 @@ Do not hallucinate.
     # =====================================================
     # BUILD VECTOR INDEX
     # =====================================================
+    @staticmethod
+    def _resume_key(resume):
+        return resume.get("content_hash") or resume.get("name", "Unknown")
+
+    def _resume_chunks_and_vectors(self, resume):
+        """
+        (spans, float32 vectors) for one resume. The pipeline's ingest
+        chunks are reused as-is; only a resume that was never chunked
+        (or failed to embed) is chunked and embedded here.
+        """
+        spans = resume.get("chunk_spans")
+        vectors = resume.get("chunk_embeddings")
+
+        if spans and vectors is not None and len(vectors) == len(spans):
+            return spans, decode_vectors(vectors)
+
+        text = resume.get("text", "")
+        spans = chunk_spans(text, getattr(self.embedder, "token_offsets", None))
+        if not spans:
+            return [], None
+
+        return spans, self.embedder.embed([text[s:e] for s, e in spans])
+
     def _build_index(self, resumes):
+        self._add_chunks(resumes)
+
+    def _add_chunks(self, resumes):
+        """
+        Append the resumes' chunk vectors under fresh ids. Each id maps
+        to its provenance (candidate id, start, end); the text itself
+        stays on the candidate and is sliced at retrieval.
+        """
+        blocks = []
+        provenance = []
+
         for r in resumes:
-            name = r.get("name", "Unknown")
+            spans, vectors = self._resume_chunks_and_vectors(r)
+            if not spans:
+                continue
 
-            paragraphs = [
-                p.strip()
-                for p in r.get("text", "").split("\n\n")
-                if len(p.strip()) > 40
-            ]
+            key = self._resume_key(r)
+            self._candidates[key] = {
+                "name": r.get("name", "Unknown"),
+                "text": r.get("text", ""),
+            }
 
-            for p in paragraphs:
-                self.chunks.append(f"Candidate: {name}\n{p}")
+            blocks.append(vectors)
+            provenance.extend((key, s, e) for s, e in spans)
 
-        if not self.chunks:
+        if not blocks:
             return
 
-        embeddings = self.embedder.encode(
-            self.chunks,
-            normalize_embeddings=True
+        self._ensure_writable()
+
+        embeddings = np.ascontiguousarray(np.concatenate(blocks), dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+
+        if self.index is None:
+            # ID map → chunks can be removed without a rebuild
+            self.index = faiss.IndexIDMap2(
+                faiss.IndexFlatIP(embeddings.shape[1])
+            )
+
+        ids = np.arange(
+            self._next_id, self._next_id + len(provenance), dtype=np.int64
         )
+        self._next_id += len(provenance)
+
+        self.index.add_with_ids(embeddings, ids)
+
+        if hnsw_of(self.index) is not None:
+            hnsw_of(self.index).hnsw.efSearch = ann_ef_search(self.index.ntotal)
 
-        embeddings = np.array(embeddings).astype("float32")
+        for chunk_id, chunk in zip(ids.tolist(), provenance):
+            self.chunks[chunk_id] = chunk
+            self._resume_chunks.setdefault(chunk[0], []).append(chunk_id)
+
+        self._maybe_rebuild_ann()
+
+    # -------------------------------------------------
+    @property
+    def tombstones(self):
+        # vectors still in the index whose chunk was removed
+        return 0 if self.index is None else self.index.ntotal - len(self.chunks)
+
+    def _maybe_rebuild_ann(self):
+        """
+        Move to HNSW once the live chunk count passes RAG_ANN_THRESHOLD,
+        and rebuild it when tombstones pass RAG_TOMBSTONE_RATIO.
+        """
+        if self.index is None or not self.chunks:
+            return
+
+        if hnsw_of(self.index) is None:
+            if not RAG_ANN_THRESHOLD or len(self.chunks) < RAG_ANN_THRESHOLD:
+                return
+        elif self.tombstones <= RAG_TOMBSTONE_RATIO * self.index.ntotal:
+            return
+
+        ids = np.fromiter(self.chunks, dtype=np.int64, count=len(self.chunks))
+        vectors = self.index.reconstruct_batch(ids)
+
+        self.index = build_hnsw_index(vectors, ids)
+        self._mapped = False
+        print(f"[RAG] HNSW index built — {len(ids)} chunks")
+
+    def _chunk_text(self, chunk_id):
+        key, start, end = self.chunks[chunk_id]
+        candidate = self._candidates[key]
+        return f"Candidate: {candidate['name']}\n{candidate['text'][start:end].strip()}"
+
+    # =====================================================
+    # INCREMENTAL ADD / REMOVE
+    # =====================================================
+    def add_resumes(self, resumes):
+        """
+        Append new resumes to the existing index, reusing their
+        ingest-time chunk vectors.
+        """
+        if not resumes:
+            return
+
+        self.raw_resumes = self.raw_resumes + list(resumes)
+        self._add_chunks(resumes)
+        self.version += 1
+        self._answers.clear()
+
+    def remove_resume(self, content_hash):
+        """
+        Drop one resume and its chunks from the index. Returns False if
+        it was not indexed.
+        """
+        before = len(self.raw_resumes)
+        self.raw_resumes = [
+            r for r in self.raw_resumes
+            if self._resume_key(r) != content_hash
+        ]
 
-        self.index = faiss.IndexFlatIP(embeddings.shape[1])
-        self.index.add(embeddings)
+        ids = self._resume_chunks.pop(content_hash, None)
+        if ids:
+            # HNSW can't delete — its vectors become tombstones that
+            # retrieval skips until the next rebuild
+            if hnsw_of(self.index) is None:
+                self._ensure_writable()
+                self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+
+            for chunk_id in ids:
+                del self.chunks[chunk_id]
+            self._maybe_rebuild_ann()
+        self._candidates.pop(content_hash, None)
+
+        if ids or len(self.raw_resumes) != before:
+            self.version += 1
+            self._answers.clear()
+            return True
+
+        return False
+
+    def resume_ids(self):
+        return {self._resume_key(r) for r in self.raw_resumes}
+
+    def _ensure_writable(self):
+        # a memory-mapped snapshot is read-only → copy before mutating;
+        # clone_index would share the mapped storage, so round-trip
+        # through a buffer for an owned copy
+        if self._mapped:
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            self._mapped = False
+
+    # =====================================================
+    # SNAPSHOTS — FAISS INDEX + CHUNK METADATA ON DISK
+    # =====================================================
+    def save_snapshot(self, directory=RAG_SNAPSHOT_DIR):
+        """
+        Write the index and its metadata if they changed since the last
+        save. The index goes to a fresh file first and chunks.json is
+        swapped in atomically, so readers never see a mismatched pair;
+        processes still mapping an older index keep its inode.
+
+        Resume text lives in an append-only resumes.jsonl — each resume
+        is written once, chunks.json only lists ids.
+        """
+        if self.index is None or self.version == self._saved_version:
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        log_path = os.path.join(directory, "resumes.jsonl")
+
+        fresh = [
+            r for r in self.raw_resumes
+            if self._resume_key(r) not in self._logged_resumes
+        ]
+        if fresh:
+            with open(log_path, "a+b") as f:
+                # end a line torn by a crashed writer before appending
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                f.write(self._log_lines(fresh).encode("utf-8"))
+            self._logged_resumes.update(self._resume_key(r) for r in fresh)
+
+        index_file = f"index-{self.version}-{uuid.uuid4().hex[:8]}.faiss"
+        faiss.write_index(self.index, os.path.join(directory, index_file))
+
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "version": self.version,
+            "embedder": getattr(self.embedder, "variant", None),
+            "dim": self.index.d,
+            "index_file": index_file,
+            "next_id": self._next_id,
+            "chunks": [
+                [chunk_id, key, start, end]
+                for chunk_id, (key, start, end) in self.chunks.items()
+            ],
+            "resume_ids": [self._resume_key(r) for r in self.raw_resumes],
+        }
+
+        meta_path = os.path.join(directory, "chunks.json")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        for old in glob.glob(os.path.join(directory, "index-*.faiss")):
+            if os.path.basename(old) != index_file:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+        # mostly removed resumes → rewrite the log with the live ones
+        if len(self._logged_resumes) > 2 * len(self.raw_resumes) + 64:
+            with open(log_path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(self._log_lines(self.raw_resumes))
+            os.replace(log_path + ".tmp", log_path)
+            self._logged_resumes = set(meta["resume_ids"])
+
+        self._saved_version = self.version
+        print(f"[RAG] snapshot v{self.version} saved — {self.index.ntotal} chunks")
+
+    @staticmethod
+    def _log_lines(resumes):
+        return "".join(
+            json.dumps({k: r.get(k) for k in SNAPSHOT_RESUME_FIELDS}) + "\n"
+            for r in resumes
+        )
+
+    @classmethod
+    def load_snapshot(cls, directory, jd_schema, embedder):
+        """
+        Chatbot over a saved snapshot, index memory-mapped read-only,
+        or None if there is no compatible snapshot.
+        """
+        try:
+            with open(os.path.join(directory, "chunks.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (
+            meta.get("format") != SNAPSHOT_FORMAT
+            or meta.get("embedder") != getattr(embedder, "variant", None)
+        ):
+            print("[RAG] snapshot ignored — different format or embedder")
+            return None
+
+        try:
+            # MMAP_IFC maps the flat / HNSW vector storage itself (plain
+            # IO_FLAG_MMAP only maps IVF lists) → workers share the pages
+            index = faiss.read_index(
+                os.path.join(directory, meta["index_file"]),
+                faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY,
+            )
+        except RuntimeError as e:
+            print(f"[RAG] snapshot unreadable: {e}")
+            return None
+
+        # search-time knob follows the current config, not the saved one
+        if hnsw_of(index) is not None:
+            hnsw_of(index).hnsw.efSearch = ann_ef_search(index.ntotal)
+
+        bot = cls([], jd_schema, embedder)
+        bot.index = index
+        bot._mapped = True
+        bot._next_id = meta["next_id"]
+        bot.version = bot._saved_version = meta["version"]
+
+        # last record per id wins; a torn final line is skipped
+        logged = {}
+        try:
+            with open(os.path.join(directory, "resumes.jsonl"), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        r = json.loads(line)
+                    except ValueError:
+                        continue
+                    logged[cls._resume_key(r)] = r
+        except OSError:
+            pass
+
+        bot._logged_resumes = set(logged)
+        bot.raw_resumes = [
+            logged[key] for key in meta["resume_ids"] if key in logged
+        ]
+        for r in bot.raw_resumes:
+            bot._candidates[cls._resume_key(r)] = {
+                "name": r.get("name") or "Unknown",
+                "text": r.get("text") or "",
+            }
+
+        for chunk_id, key, start, end in meta["chunks"]:
+            if key not in bot._candidates:
+                continue
+            bot.chunks[chunk_id] = (key, start, end)
+            bot._resume_chunks.setdefault(key, []).append(chunk_id)
+
+        print(f"[RAG] snapshot v{bot.version} loaded — {index.ntotal} chunks (mmap)")
+        return bot
+
+    # =====================================================
+    # QUERY / ANSWER CACHE
+    # =====================================================
+    @staticmethod
+    def _normalize_query(query):
+        return re.sub(r"\s+", " ", query.lower()).strip(" ?!.")
+
+    def _embed_query(self, query):
+        """
+        Normalized query → (dim,) float32 unit vector, LRU-cached. The
+        vector depends only on the text, so entries never go stale.
+        """
+        key = self._normalize_query(query)
+
+        vector = self._query_vectors.get(key)
+        if vector is not None:
+            self._query_vectors.move_to_end(key)
+            return vector
+
+        vector = np.asarray(
+            self.embedder.encode([query], normalize_embeddings=True),
+            dtype=np.float32,
+        )[0]
+
+        self._query_vectors[key] = vector
+        if len(self._query_vectors) > RAG_QUERY_CACHE_SIZE:
+            self._query_vectors.popitem(last=False)
+
+        return vector
+
+    def _cached_answer(self, key, query):
+        """
+        Answer for this exact key, else for the most similar cached
+        question at the same versions (≥ RAG_ANSWER_SIMILARITY).
+        """
+        hit = self._answers.get(key)
+        if hit is not None:
+            self._answers.move_to_end(key)
+            return hit[1]
+
+        if RAG_ANSWER_SIMILARITY <= 0:
+            return None
+
+        same = [k for k in self._answers if k[1:] == key[1:]]
+        if not same:
+            return None
+
+        sims = np.stack([self._answers[k][0] for k in same]) @ self._embed_query(query)
+        best = int(np.argmax(sims))
+
+        if sims[best] < RAG_ANSWER_SIMILARITY:
+            return None
+
+        self._answers.move_to_end(same[best])
+        return self._answers[same[best]][1]
+
+    def _store_answer(self, key, query, answer):
+        if RAG_ANSWER_CACHE_SIZE <= 0 or answer.startswith(LLM_FAILURES):
+            return
+
+        # resumes changed while the LLM was answering → already stale
+        if key[1] != self.version:
+            return
+
+        self._answers[key] = (self._embed_query(query), answer)
+        if len(self._answers) > RAG_ANSWER_CACHE_SIZE:
+            self._answers.popitem(last=False)
 
     # =====================================================
     # RETRIEVE
@@ -212,19 +746,48 @@ Do not hallucinate.
         if self.index is None:
             return []
 
-        q_emb = self.embedder.encode(
-            [query],
-            normalize_embeddings=True
-        ).astype("float32")
+        q_emb = self._embed_query(query)[None]
 
-        scores, indices = self.index.search(q_emb, top_k)
+        scores, indices = self.index.search(
+            q_emb, top_k, params=self._search_params()
+        )
 
         return [
-            self.chunks[i]
-            for i in indices[0]
-            if 0 <= i < len(self.chunks)
+            self._chunk_text(i)
+            for i in indices[0].tolist()
+            if i in self.chunks
         ]
 
+    def _search_params(self):
+        """
+        Search parameters that skip tombstoned ids inside the search,
+        so removed chunks never take result slots; None without
+        tombstones. Rebuilt only when the index or chunk set changes.
+        """
+        if not self.tombstones:
+            return None
+
+        key = (id(self.index), self.index.ntotal, len(self.chunks))
+        if self._live_params is not None and self._live_params[0] == key:
+            return self._live_params[1]
+
+        live = np.fromiter(self.chunks, dtype=np.int64, count=len(self.chunks))
+        dead = np.setdiff1d(faiss.vector_to_array(self.index.id_map), live)
+
+        batch = faiss.IDSelectorBatch(dead)
+        selector = faiss.IDSelectorNot(batch)
+        hnsw = hnsw_of(self.index)
+        if hnsw is not None:
+            params = faiss.SearchParametersHNSW(
+                sel=selector, efSearch=hnsw.hnsw.efSearch
+            )
+        else:
+            params = faiss.SearchParameters(sel=selector)
+
+        # the params only point at the selectors → keep them referenced
+        self._live_params = (key, params, selector, batch)
+        return params
+
     # =====================================================
     # LLM CALL
     # =====================================================
@@ -272,35 +835,77 @@ Do not hallucinate.
         top_k=5,
         chat_history=None,
         ranking_df=None,
+        ranking_version=None,
     ):
-        if self.index is None:
-            return "No resumes available yet."
+        answer, pending = self.prepare_response(
+            user_query, top_k, chat_history, ranking_df, ranking_version
+        )
+        if pending is None:
+            return answer
+
+        answer = self.complete_response(pending)
+        self.remember_response(pending, answer)
+        return answer
+
+    # -----------------------------------------------------
+    # Split for callers that share the chatbot across threads:
+    # prepare / remember touch index + caches (hold a lock),
+    # complete is the slow LLM round-trip (run it unlocked).
+    # -----------------------------------------------------
+    def prepare_response(
+        self,
+        user_query,
+        top_k=5,
+        chat_history=None,
+        ranking_df=None,
+        ranking_version=None,
+    ):
+        """
+        Route the query → (answer, None), or (None, pending) when it
+        needs the LLM; pass `pending` to complete_response().
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return "No resumes available yet.", None
 
         # 1️⃣ META
         meta = self._meta_answer(user_query)
         if meta:
-            return meta
+            return meta, None
 
         # 2️⃣ RANKING
         rank_ans = self._ranking_answer(user_query, ranking_df)
         if rank_ans:
-            return rank_ans
+            return rank_ans, None
 
         # 3️⃣ STRUCTURED
         structured = self._structured_answer(user_query)
         if structured:
-            return structured
+            return structured, None
 
         # 4️⃣ FAST
         fast = self._fast_answer(user_query)
         if fast:
-            return fast
+            return fast, None
 
         # 5️⃣ RETRIEVE + ALWAYS LLM (NO TEXT DUMP)
+        # repeat questions on an unchanged pool skip retrieval and the
+        # LLM; follow-ups depend on history, so they always go through
+        cache_key = None
+        if not chat_history:
+            cache_key = (
+                self._normalize_query(user_query),
+                self.version,
+                top_k,
+                ranking_version,
+            )
+            cached = self._cached_answer(cache_key, user_query)
+            if cached is not None:
+                return cached, None
+
         retrieved_chunks = self._retrieve(user_query, top_k)
 
         if not retrieved_chunks:
-            return "I couldn't find relevant information in the resumes."
+            return "I couldn't find relevant information in the resumes.", None
 
         context_block = "\n\n---\n\n".join(retrieved_chunks)
 
@@ -323,4 +928,17 @@ Instructions:
 - DO NOT dump raw resume text.
 """
 
-        return self._call_llm(prompt, chat_history)
+        return None, {
+            "query": user_query,
+            "prompt": prompt,
+            "chat_history": chat_history,
+            "cache_key": cache_key,
+        }
+
+    def complete_response(self, pending):
+        # no chatbot state touched → safe without the caller's lock
+        return self._call_llm(pending["prompt"], pending["chat_history"])
+
+    def remember_response(self, pending, answer):
+        if pending["cache_key"] is not None:
+            self._store_answer(pending["cache_key"], pending["query"], answer)
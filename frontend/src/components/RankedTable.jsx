@@ -2,23 +2,33 @@ import React, { useEffect, useState } from "react";
 import api from "../api/axios";
 import Card from "./Card";
 
+const PAGE_SIZE = 25;
+
 export default function RankedTable({ refresh, sessionId }) {
   const [candidates, setCandidates] = useState([]);
+  const [page, setPage] = useState(0);
+  const [total, setTotal] = useState(0);
   const [statusMsg, setStatusMsg] = useState("");
   const [sending, setSending] = useState(false);
   const [decisions, setDecisions] = useState({});
   const [loadingRank, setLoadingRank] = useState(false);
 
-  const fetchCandidates = async () => {
+  const fetchCandidates = async (pageIndex = page) => {
     try {
       setLoadingRank(true);
       setStatusMsg("");
 
+      // 🔥 server returns one page; total comes back in a header
       const res = await api.get("/ranked_candidates", {
-        params: { session_id: sessionId },
+        params: {
+          session_id: sessionId,
+          limit: PAGE_SIZE,
+          offset: pageIndex * PAGE_SIZE,
+        },
       });
 
       setCandidates(res.data || []);
+      setTotal(Number(res.headers["x-total-count"]) || 0);
     } catch (err) {
       console.error(err);
       setStatusMsg("Failed to fetch ranked candidates.");
@@ -30,10 +40,18 @@ export default function RankedTable({ refresh, sessionId }) {
   useEffect(() => {
     // ✅ SAFE GUARD ADDED
     if (refresh && sessionId) {
-      fetchCandidates();
+      setPage(0);
+      fetchCandidates(0);
     }
   }, [refresh, sessionId]);
 
+  const pageCount = Math.max(1, Math.ceil(total / PAGE_SIZE));
+
+  const goToPage = (pageIndex) => {
+    setPage(pageIndex);
+    fetchCandidates(pageIndex);
+  };
+
   const sendEmail = async (email, name, type) => {
     if (!email || email === "N/A") {
       setStatusMsg("Invalid candidate email.");
@@ -153,7 +171,7 @@ export default function RankedTable({ refresh, sessionId }) {
                       "
                     >
                       <td className="px-4 py-4 text-sm text-slate-400">
-                        #{idx + 1}
+                        #{c.rank ?? page * PAGE_SIZE + idx + 1}
                       </td>
 
                       <td className="px-4 py-4 font-medium text-white">
@@ -234,6 +252,46 @@ export default function RankedTable({ refresh, sessionId }) {
             </table>
           </div>
         )}
+
+        {/* 📄 PAGINATION */}
+        {!loadingRank && total > PAGE_SIZE && (
+          <div className="flex items-center justify-between text-sm text-slate-400">
+            <span>
+              Showing {page * PAGE_SIZE + 1}–
+              {Math.min((page + 1) * PAGE_SIZE, total)} of {total}
+            </span>
+
+            <div className="flex gap-2">
+              <button
+                disabled={page === 0}
+                onClick={() => goToPage(page - 1)}
+                className="
+                  rounded-md
+                  border border-white/10
+                  px-3 py-1.5
+                  hover:bg-indigo-500/10
+                  disabled:opacity-50
+                "
+              >
+                Previous
+              </button>
+
+              <button
+                disabled={page + 1 >= pageCount}
+                onClick={() => goToPage(page + 1)}
+                className="
+                  rounded-md
+                  border border-white/10
+                  px-3 py-1.5
+                  hover:bg-indigo-500/10
+                  disabled:opacity-50
+                "
+              >
+                Next
+              </button>
+            </div>
+          </div>
+        )}
       </div>
     </Card>
   );
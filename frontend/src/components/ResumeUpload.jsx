@@ -28,12 +28,13 @@ export default function ResumeUpload({ onUploadComplete, sessionId }) {
 
   const handleFileChange = (e) => {
     const selectedFiles = Array.from(e.target.files);
-    const pdfFiles = selectedFiles.filter((file) =>
-      file.name.toLowerCase().endsWith(".pdf")
-    );
+    const pdfFiles = selectedFiles.filter((file) => {
+      const name = file.name.toLowerCase();
+      return name.endsWith(".pdf") || name.endsWith(".zip");
+    });
 
     if (pdfFiles.length !== selectedFiles.length) {
-      setMessage("Only PDF resumes are supported.");
+      setMessage("Only PDF resumes or ZIP archives are supported.");
     } else {
       setMessage("");
     }
@@ -61,31 +62,55 @@ export default function ResumeUpload({ onUploadComplete, sessionId }) {
     abortControllerRef.current = controller;
 
     try {
-      const uploadPromises = files.map((file) => {
-        const formData = new FormData();
-        formData.append("file", file);
-        formData.append("session_id", sessionId);
-
-        return api
-          .post("/upload_resume", formData, {
-            headers: { "Content-Type": "multipart/form-data" },
-            signal: controller.signal,
-          })
-          .then(() => {
-            setCompletedCount((prev) => prev + 1);
-          });
-      });
+      // 🔥 One bulk request → one batched ingestion on the backend
+      const formData = new FormData();
+      files.forEach((file) => formData.append("files", file));
+      formData.append("session_id", sessionId);
 
-      const results = await Promise.allSettled(uploadPromises);
+      const res = await api.post("/upload_resumes", formData, {
+        headers: { "Content-Type": "multipart/form-data" },
+        signal: controller.signal,
+      });
 
       // If aborted, do nothing further
       if (controller.signal.aborted) return;
 
-      const failed = results.filter((r) => r.status === "rejected").length;
+      // 🔥 Ingestion runs in the background — poll the job
+      const report = res.data?.files || [];
+      const statuses = Object.fromEntries(
+        report.map((r) => [r.file, r.status])
+      );
+
+      const jobId = res.data?.job_id;
+
+      while (jobId) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        if (controller.signal.aborted) return;
+
+        const { data: job } = await api.get(`/jobs/${jobId}`, {
+          signal: controller.signal,
+        });
+
+        setCompletedCount(
+          Math.round((job.progress.done / (job.progress.total || 1)) * files.length)
+        );
+
+        if (job.status === "done" || job.status === "failed") {
+          Object.assign(statuses, job.files);
+          break;
+        }
+      }
+
+      const count = (status) =>
+        Object.values(statuses).filter((s) => s === status).length;
+
+      const indexed = count("indexed");
+      const duplicates = count("duplicate");
+      const failed = Object.keys(statuses).length - indexed - duplicates;
 
-      if (failed > 0) {
+      if (failed > 0 || duplicates > 0) {
         setMessage(
-          `${files.length - failed} resumes uploaded successfully, ${failed} failed.`
+          `${indexed} resumes indexed, ${duplicates} duplicates skipped, ${failed} failed.`
         );
       } else {
         setMessage("All resumes uploaded and indexed successfully.");
@@ -131,7 +156,7 @@ export default function ResumeUpload({ onUploadComplete, sessionId }) {
           <input
             type="file"
             multiple
-            accept=".pdf"
+            accept=".pdf,.zip"
             onChange={handleFileChange}
             disabled={uploading}
             className="hidden"
@@ -141,7 +166,7 @@ export default function ResumeUpload({ onUploadComplete, sessionId }) {
             Upload candidate resumes
           </p>
           <p className="mt-1 text-sm text-slate-400">
-            PDF only • Cancellable parallel ingestion
+            PDF or ZIP • Cancellable batched ingestion
           </p>
         </label>
 
@@ -195,7 +220,7 @@ export default function ResumeUpload({ onUploadComplete, sessionId }) {
         {uploading && (
           <div className="space-y-2">
             <div className="flex justify-between text-xs text-slate-400">
-              <span>Uploading resumes</span>
+              <span>Ingesting resumes</span>
               <span>
                 {completedCount} / {files.length}
               </span>